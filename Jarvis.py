@@ -1,12 +1,34 @@
 import hlt
 import logging
-from collections import OrderedDict
-import math
-from astar import AStar
-
-game = hlt.Game("Jarvis")
+import os
+import numpy as np
+
+import assignment
+
+# Ist JARVIS_RECORD_FRAMES gesetzt, werden alle Eingaben der Engine in diese Datei geschrieben
+# (zum Nachspielen mit benchmarks/replay.py)
+# Log wird im Hintergrund geschrieben; DEBUG-Meldungen nur mit JARVIS_DEBUG_LOG, höchstens 20 pro Stelle und Runde
+game = hlt.Game("Jarvis", incremental_updates=True, record_frames=os.environ.get("JARVIS_RECORD_FRAMES"),
+                log_level=logging.DEBUG if os.environ.get("JARVIS_DEBUG_LOG") else logging.INFO,
+                buffered_logging=True, max_logs_per_call_site=20)
+# Ist JARVIS_INSTRUMENTATION gesetzt, werden Zeiten und Zähler jeder Runde in diese Datei geschrieben
+# (auswerten mit python benchmarks/instrumentation_report.py DATEI...)
+if os.environ.get("JARVIS_INSTRUMENTATION"):
+    hlt.instrumentation.enable(os.environ["JARVIS_INSTRUMENTATION"])
 logging.info("Starting my Jarvis bot")
-pathfinder = None
+# Wege werden über den Sichtbarkeitsgraphen gesucht und zwischen Schiffen mit gleichem Start und Ziel geteilt
+pathfinder = hlt.path_cache.PathCache(game.visibility_graph)
+
+# Abstand, ab dem ein Wegpunkt als erreicht gilt
+WAYPOINT_REACHED_DISTANCE = 1.5
+# Gegner, die erst nach mehr Runden eingeholt wären, werden an ihrer aktuellen Position angeflogen
+MAX_INTERCEPT_TURNS = 10
+# Sicherheitsabstand (Sekunden) zum Zeitlimit der Runde, ab dem nur noch einfache Befehle erzeugt werden
+TURN_SAFETY_MARGIN = 0.5
+
+scheduler = hlt.scheduler.TurnScheduler(safety_margin=TURN_SAFETY_MARGIN)
+# Schaden, den gegnerische Schiffe in der nächsten Runde anrichten können, grob gerastert (jede Runde neu berechnet)
+threat_field = hlt.threat.ThreatField(game.initial_layout.width, game.initial_layout.height)
 
 
 def fly_to_point(ship: hlt.entity.Ship, point: (int, int)):
@@ -16,11 +38,12 @@ def fly_to_point(ship: hlt.entity.Ship, point: (int, int)):
         target=target,
         game_map=game_map,
         speed=int(hlt.constants.MAX_SPEED),
-        ignore_ships=False
+        ignore_ships=False,
+        reservations=reservations
     )
 
     if navigate_command:
-        command_queue.append(navigate_command)
+        command_queue.add(navigate_command)
 
 
 def fly_to(ship: hlt.entity.Ship, object: hlt.entity):
@@ -28,128 +51,178 @@ def fly_to(ship: hlt.entity.Ship, object: hlt.entity):
                 ship.closest_point_to(object),
                 game_map,
                 speed=int(hlt.constants.MAX_SPEED),
-                ignore_ships=False)
+                ignore_ships=False,
+                reservations=reservations)
 
     if navigate_command:
-        command_queue.append(navigate_command)
+        command_queue.add(navigate_command)
         return object
     else:
         return None
 
 
+def fly_straight(ship: hlt.entity.Ship, target):
+    # Notfall-Befehl, wenn die Zeit der Runde knapp wird: ohne Hindernisprüfung geradeaus zum nächsten Wegpunkt,
+    # sonst zum Ziel (Abfangpunkt, Planet oder Schiff); nur die schon reservierten Bewegungen werden beachtet
+    if isinstance(target, hlt.entity.Planet) and ship.can_dock(target):
+        command_queue.dock(ship, target)
+        reservations.reserve_stationary(ship)
+        paths_for_ships.pop(ship.id, None)
+        return
 
-paths_for_ships = {}
-    
+    path, _ = paths_for_ships.get(ship.id, (None, None))
 
-while True:
-    game_map = game.update_map()
-    command_queue = []
-    planned_planets = []
-    ships_assigned_to_target_ship = {}
-
-    if pathfinder is None:
-        pathfinder = AStar(game_map)
-    
-    for ship in game_map.get_me().all_ships():
-        ship: hlt.entity.Ship
+    # erreichte Wegpunkte entfernen (wie in der normalen Planung)
+    while path and ship.calculate_distance_between(hlt.entity.Position(*path[0])) < WAYPOINT_REACHED_DISTANCE:
+        path.pop(0)
+
+    if path:
+        point = hlt.entity.Position(*path[0])
+    elif target is not None:
+        point = ship.closest_point_to(target, min_distance=2 if isinstance(target, hlt.entity.Planet) else 3)
+    else:
+        reservations.reserve_stationary(ship)
+        return
+
+    # schnellste Geschwindigkeit, mit der das Schiff keiner reservierten Bewegung zu nahe kommt
+    angle = round(ship.calculate_angle_between(point))
+    speeds = np.arange(int(min(hlt.constants.MAX_SPEED, ship.calculate_distance_between(point))), 0, -1)
+    conflicts = reservations.conflicts(ship.x, ship.y, ship.x + speeds * np.cos(np.radians(angle)),
+                                       ship.y + speeds * np.sin(np.radians(angle)))
+    free_speeds = speeds[~conflicts]
+
+    if len(free_speeds):
+        command_queue.add(ship.navigate(point, game_map, speed=int(free_speeds[0]), avoid_obstacles=False,
+                                        reservations=reservations))
+    else:
+        reservations.reserve_stationary(ship)
 
-        if ship.docking_status != ship.DockingStatus.UNDOCKED:
-            continue  # Skip this ship
 
-        entities_by_distance = game_map.nearby_entities_by_distance(ship)
-        entities_by_distance = OrderedDict(sorted(entities_by_distance.items(), key=lambda t: t[0]))
+def intercept_points(targets_by_ship):
+    # Abfangpunkte aller Angreifer für alle angegriffenen Schiffe in einem Aufruf; die Gegner fliegen dabei mit
+    # ihrer letzten Geschwindigkeit weiter (nicht rechtzeitig einholbare Gegner werden dort angeflogen, wo sie sind)
+    attackers = [ship for ship in undocked_ships if isinstance(targets_by_ship.get(ship.id), hlt.entity.Ship)]
+    if not attackers:
+        return {}
 
-        empty_planets_by_distance = []
-        enemy_ships_by_distance = []
+    enemies = list({targets_by_ship[ship.id].id: targets_by_ship[ship.id] for ship in attackers}.values())
+    enemy_columns = {enemy.id: column for column, enemy in enumerate(enemies)}
+    x, y, _ = hlt.columns.intercept_matrix(hlt.columns.EntityColumns(attackers), hlt.columns.EntityColumns(enemies),
+                                           max_turns=MAX_INTERCEPT_TURNS)
 
-        own_ships = game_map.get_me().all_ships()
+    points = {}
+    for row, ship in enumerate(attackers):
+        column = enemy_columns[targets_by_ship[ship.id].id]
+        points[ship.id] = hlt.entity.Position(x[row, column], y[row, column])
+    return points
 
-        for object in entities_by_distance:
-            entity = entities_by_distance[object][0]
-            if isinstance(entity, hlt.entity.Planet):
-                if not entity.is_owned():
-                    empty_planets_by_distance.append(entity)
-            elif isinstance(entity, hlt.entity.Ship):
-                if entity not in own_ships:
-                    enemy_ships_by_distance.append(entity)
 
-        if len(empty_planets_by_distance) > 0: # gibt es nicht besetzte Planeten
-            target_planet = empty_planets_by_distance[0] # nächsten leeren Planeten nehmen
+@hlt.instrumentation.timed("ships_by_priority")
+def ships_by_priority(ships):
+    # Schiffe nahe an gegnerischen Schiffen werden zuerst geplant
+    ship_columns = game_map.ship_columns
+    enemy_columns = ship_columns.subset(ship_columns.owner != game_map.my_id)
 
-            # irgendeine Suche
-            if target_planet in planned_planets:  # nächsten leeren Planeten nehmen, der noch nicht von eigenen Schiffen angeflogen wird (nötig, da Schiff sonst kein Ziel hat, wenn der gleiche Planet der nächste ist)
-                for possible_planet in empty_planets_by_distance:
-                    if possible_planet not in planned_planets:
-                        target_planet = possible_planet
-                        break
+    if len(enemy_columns) == 0 or not ships:
+        return ships
 
-            if ship.can_dock(target_planet):
-                command_queue.append(ship.dock(target_planet))
-                paths_for_ships.pop(ship.id, None)
-            else:
-                path = paths_for_ships.get(ship.id, None)
-                
-                if not path:
-                    logging.info(f"ship with id {int(ship.id)} needs new path")
-                    point_x = target_planet.x + (target_planet.radius + 2) * math.cos(ship.calculate_angle_between(target_planet))
-                    point_y = target_planet.y + (target_planet.radius + 2) * math.sin(ship.calculate_angle_between(target_planet))
+    my_columns = hlt.columns.EntityColumns(ships)
+    nearest_enemy = hlt.columns.distance_matrix(my_columns, enemy_columns).min(axis=1)
+    return [ships[i] for i in np.argsort(nearest_enemy, kind="stable")]
 
-                    path = pathfinder.find_path(int(ship.x), int(ship.y), int(point_x), int(point_y))
-                    paths_for_ships.update({ship.id: path})
-                
-                fly_to_point(ship, path.pop(0))
 
-            planned_planets.append(target_planet) # ausgewählten Planeten zur Liste der Planeten, die angeflogen werden, hinzufügen
+paths_for_ships = {}  # Schiff-ID -> (Wegpunkte, Zielplanet)
+targets_for_ships = {}  # Schiff-ID -> Ziel der letzten Runde
 
-        else:  # Schiffe angreifen und die Planeten einnehmen
-    
-            # target_ship = enemy_ships_by_distance[0]
-            target_ship: hlt.entity.Ship
 
-            first_ship, sec_ship = enemy_ships_by_distance[0], None
-            first_ship: hlt.entity.Ship
-            sec_ship: hlt.entity.Ship
+while True:
+    game_map = game.update_map()
+    # höchstens ein Befehl pro Schiff; alle Befehle werden am Ende der Runde auf einmal gesendet
+    command_queue = hlt.commands.CommandBuffer()
+    # Bewegungen, die eigene Schiffe in dieser Runde schon machen; spätere Schiffe weichen ihnen aus
+    reservations = hlt.reservation.ReservationTable()
+
+    scheduler.start(game.turn_started_at)
 
-            ships_assigned_to_target_ship_amount = int(ships_assigned_to_target_ship.get(first_ship.id, 0))
-            max_amount = math.ceil(len(own_ships) / len(enemy_ships_by_distance))
+    # Wege zerstörter Schiffe verwerfen
+    for destroyed_ship in game_map.last_diff.destroyed_ships:
+        paths_for_ships.pop(destroyed_ship.id, None)
 
-            if ships_assigned_to_target_ship_amount < max_amount:
+    # gespeicherte Wege um oder zu zerstörten Planeten verwerfen
+    for destroyed_planet in game_map.last_diff.destroyed_planets:
+        pathfinder.invalidate_planet(destroyed_planet)
 
-                for possible_ship in enemy_ships_by_distance:
-                    possible_ship: hlt.entity.Ship
+    undocked_ships = [ship for ship in game_map.get_me().all_ships()
+                      if ship.docking_status == ship.DockingStatus.UNDOCKED]
 
-                    logging.info("Mögliches Schiff überprüfen")
+    threat_field.update(game_map)
 
-                    if int(ships_assigned_to_target_ship.get(possible_ship.id, 0)) < max_amount:
-                        sec_ship = possible_ship
-                        logging.info("Zweites Schiff gefunden")
-                        break
+    # Ziele für alle Schiffe gemeinsam verteilen (Andockplätze und gegnerische Schiffe)
+    targets_for_ships = assignment.assign_targets(game_map, undocked_ships,
+                                                  previous_targets=targets_for_ships,
+                                                  time_limit=max(scheduler.remaining() / 4, 0),
+                                                  threat=threat_field)
 
-            # elif ships_assigned_to_target_ship_amount == max_amount:
-            else:
-                logging.info("Neues Schiff muss gesucht werden")
+    intercepts = intercept_points(targets_for_ships)
+
+    planning_started = scheduler.elapsed()
+
+    for ship, in_time in scheduler.schedule(ships_by_priority(undocked_ships)):
+        ship: hlt.entity.Ship
+
+        if not in_time:  # keine Zeit mehr für die Planung
+            fly_straight(ship, intercepts.get(ship.id, targets_for_ships.get(ship.id)))
+            continue
 
-                for possible_ship in enemy_ships_by_distance:
-                    possible_ship: hlt.entity.Ship
+        target = targets_for_ships.get(ship.id)
 
-                    logging.info("Mögliches Schiff überprüfen")
+        if target is None:
+            continue  # kein Ziel mehr frei
 
-                    if int(ships_assigned_to_target_ship.get(possible_ship.id, 0)) < max_amount:
-                        if first_ship is None:
-                            first_ship = possible_ship
-                            logging.info("Erstes Schiff gefunden")
-                        else:
-                            sec_ship = possible_ship
-                            logging.info("Zweites Schiff gefunden")
-                            break
+        if isinstance(target, hlt.entity.Planet):
+            target_planet = target
 
-            logging.info("Schiff wird angegriffen...")
-            target_ship = fly_to(ship, first_ship)
+            if ship.can_dock(target_planet):
+                command_queue.dock(ship, target_planet)
+                paths_for_ships.pop(ship.id, None)
+            else:
+                path, path_target = paths_for_ships.get(ship.id, (None, None))
+
+                if not path or path_target is not target_planet:
+                    logging.debug("ship with id %d needs new path", ship.id)
+                    # Punkt 2 Einheiten vor der Oberfläche auf der dem Schiff zugewandten Seite des Planeten
+                    point = ship.closest_point_to(target_planet, min_distance=2)
 
-            if target_ship is not None:
-                ships_assigned_to_target_ship.update({target_ship.id: int(ships_assigned_to_target_ship.get(target_ship.id, 0)) + 1})
+                    path = pathfinder.find_path(ship, point)
+                    paths_for_ships.update({ship.id: (path, target_planet)})
 
-            logging.info(ships_assigned_to_target_ship)
+                # erreichte Wegpunkte entfernen; der nächste wird so lange angeflogen, bis er erreicht ist
+                while path and ship.calculate_distance_between(hlt.entity.Position(*path[0])) < WAYPOINT_REACHED_DISTANCE:
+                    path.pop(0)
+
+                if path:
+                    fly_to_point(ship, path[0])
+                else:  # kein Weg gefunden (z.B. Zielpunkt im Planeten), direkt anfliegen
+                    fly_to(ship, target_planet)
+
+        else:  # Schiffe angreifen und die Planeten einnehmen
+            paths_for_ships.pop(ship.id, None)
+            logging.debug("Schiff %d greift an...", ship.id)
+            # dorthin fliegen, wo der Gegner sein wird, statt ihm hinterherzufliegen
+            fly_to(ship, intercepts.get(ship.id, target))
+
+    logging.info("%s", pathfinder)
+
+    # ein zweiter Befehl für dasselbe Schiff deutet auf einen Planungsfehler hin
+    if command_queue.dropped_duplicates:
+        logging.warning("%d doppelte Befehle verworfen, %d ersetzt", command_queue.dropped_duplicates,
+                        command_queue.replaced)
+
+    if hlt.instrumentation.enabled:
+        hlt.instrumentation.add_time("planning", scheduler.elapsed() - planning_started)
+        hlt.instrumentation.end_turn(turn_ms=round(scheduler.elapsed() * 1e3, 4), ships=len(undocked_ships),
+                                     commands=len(command_queue), dropped_commands=command_queue.dropped_duplicates,
+                                     replaced_commands=command_queue.replaced)
 
     game.send_command_queue(command_queue)
     # TURN END
@@ -0,0 +1,153 @@
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+import hlt
+
+# Aufschlag auf die Kosten eines Angriffs, solange es noch freie Andockplätze gibt (Planeten werden bevorzugt)
+ENEMY_COST_PENALTY = 50.0
+# Bonus für das Ziel der letzten Runde, damit Schiffe nicht jede Runde das Ziel wechseln
+KEEP_TARGET_BONUS = 5.0
+# Mindestgebot der Auktion; das Ergebnis ist höchstens (Anzahl Schiffe * EPSILON) teurer als das Optimum
+EPSILON = 1.0
+# maximale Anzahl an Geboten pro Schiff, danach wird der Rest gierig verteilt
+MAX_BIDS_PER_SHIP = 50
+# Aufschlag pro Schadenspunkt, den Gegner am Ziel in der nächsten Runde anrichten können (ein Gegner = 6.4)
+THREAT_COST_PER_DAMAGE = 0.1
+# Abstand des Andockpunkts zur Planetenoberfläche (wie beim Anflug in Jarvis.py)
+DOCKING_POINT_DISTANCE = 2
+
+
+def _planet_slots(game_map: hlt.game_map.Map):
+    # ein Eintrag pro freiem Andockplatz auf unbesetzten oder eigenen Planeten
+    slots = []
+    for planet in game_map.all_planets():
+        if planet.is_owned() and planet.owner.id != game_map.my_id:
+            continue
+        free_spots = planet.num_docking_spots - len(planet.all_docked_ships())
+        slots.extend([planet] * max(free_spots, 0))
+    return slots
+
+
+def build_cost_matrix(game_map: hlt.game_map.Map, ships, previous_targets=None, threat=None):
+    """
+    Kostenmatrix Schiffe x Ziele. Ziele sind die freien Andockplätze (jeder Platz ist eine eigene Spalte) und die
+    gegnerischen Schiffe (jedes so oft, wie Angreifer für ein Schiff erlaubt sind).
+    Mit einem Bedrohungsfeld (hlt.threat.ThreatField) werden Ziele in Reichweite vieler Gegner teurer.
+
+    :return: Kostenmatrix und Liste der Ziele (eine pro Spalte)
+    """
+    planet_slots = _planet_slots(game_map)
+    ship_columns = game_map.ship_columns
+    enemy_columns = ship_columns.subset(ship_columns.owner != game_map.my_id)
+
+    # wie bisher: höchstens ceil(eigene Schiffe / gegnerische Schiffe) Angreifer pro gegnerischem Schiff
+    attackers_per_enemy = math.ceil(len(ships) / len(enemy_columns)) if len(enemy_columns) else 0
+    targets = planet_slots + [enemy for enemy in enemy_columns.entities for _ in range(attackers_per_enemy)]
+    if not ships or not targets:
+        return np.zeros((len(ships), len(targets))), targets
+
+    my_columns = hlt.columns.EntityColumns(ships)
+    costs = []
+
+    if planet_slots:
+        planet_columns = hlt.columns.EntityColumns(planet_slots)
+        # Entfernung bis zur Oberfläche des Planeten
+        distances = hlt.columns.distance_matrix(my_columns, planet_columns)
+        planet_costs = distances - planet_columns.radius
+        if threat is not None:
+            # Bedrohung am Andockpunkt auf der dem Schiff zugewandten Seite des Planeten
+            scale = (planet_columns.radius + DOCKING_POINT_DISTANCE) / np.maximum(distances, 1e-9)
+            docking_x = planet_columns.x + (my_columns.x[:, np.newaxis] - planet_columns.x) * scale
+            docking_y = planet_columns.y + (my_columns.y[:, np.newaxis] - planet_columns.y) * scale
+            planet_costs += THREAT_COST_PER_DAMAGE * threat.values_at(docking_x, docking_y)
+        costs.append(planet_costs)
+
+    if attackers_per_enemy:
+        enemy_costs = hlt.columns.distance_matrix(my_columns, enemy_columns)
+        if planet_slots:
+            enemy_costs += ENEMY_COST_PENALTY
+        if threat is not None:
+            enemy_costs += THREAT_COST_PER_DAMAGE * threat.values_at(enemy_columns.x, enemy_columns.y)
+        costs.append(np.repeat(enemy_costs, attackers_per_enemy, axis=1))
+
+    costs = np.hstack(costs)
+
+    if previous_targets:
+        target_ids = np.array([id(target) for target in targets])
+        for row, ship in enumerate(ships):
+            previous = previous_targets.get(ship.id)
+            if previous is not None:
+                costs[row, target_ids == id(previous)] -= KEEP_TARGET_BONUS
+
+    return costs, targets
+
+
+def solve_assignment(costs, epsilon=EPSILON, time_limit=None):
+    """
+    Auktionsalgorithmus (Bertsekas) für die Zuordnung mit minimalen Gesamtkosten. Jede Zeile (Schiff) bekommt
+    höchstens eine Spalte (Ziel). Läuft die Zeit ab, werden die übrigen Zeilen gierig verteilt.
+
+    :return: Liste mit der zugeordneten Spalte pro Zeile (-1, falls keine Spalte mehr frei ist)
+    """
+    num_rows, num_cols = costs.shape
+    assigned = np.full(num_rows, -1)
+    if num_rows == 0 or num_cols == 0:
+        return assigned
+
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    benefit = -costs
+    prices = np.zeros(num_cols)
+    owner = np.full(num_cols, -1)
+    unassigned = deque(range(num_rows))
+    max_bids = MAX_BIDS_PER_SHIP * num_rows
+    bids = 0
+
+    # bei mehr Schiffen als Zielen kann die Auktion nicht für alle enden
+    while unassigned and num_rows <= num_cols and bids < max_bids:
+        if deadline is not None and bids % 32 == 0 and time.perf_counter() > deadline:
+            break
+        row = unassigned.popleft()
+        values = benefit[row] - prices
+        best_col = int(np.argmax(values))
+        best_value = values[best_col]
+        values[best_col] = -np.inf
+        second_value = values.max() if num_cols > 1 else best_value
+
+        prices[best_col] += best_value - second_value + epsilon
+        if owner[best_col] >= 0:
+            assigned[owner[best_col]] = -1
+            unassigned.append(owner[best_col])
+        owner[best_col] = row
+        assigned[row] = best_col
+        bids += 1
+
+    # restliche Schiffe gierig auf die günstigsten noch freien Ziele verteilen
+    free = owner < 0
+    for row in sorted(unassigned, key=lambda r: costs[r][free].min() if free.any() else 0):
+        if not free.any():
+            break
+        col = int(np.flatnonzero(free)[np.argmin(costs[row][free])])
+        assigned[row] = col
+        free[col] = False
+
+    return assigned
+
+
+@hlt.instrumentation.timed("assign_targets")
+def assign_targets(game_map: hlt.game_map.Map, ships, previous_targets=None, time_limit=None, threat=None):
+    """
+    Ordnet jedem Schiff ein Ziel zu (Planet zum Andocken oder gegnerisches Schiff), sodass die Summe der Entfernungen
+    möglichst klein ist.
+
+    :param ships: die zu verteilenden (nicht angedockten) eigenen Schiffe
+    :param previous_targets: Ziele der letzten Runde (Schiff-ID -> Ziel), werden leicht bevorzugt
+    :param time_limit: maximale Rechenzeit in Sekunden
+    :param threat: Bedrohungsfeld der Runde (optional), siehe build_cost_matrix
+    :return: Dict Schiff-ID -> Ziel (Schiffe ohne Ziel fehlen)
+    """
+    costs, targets = build_cost_matrix(game_map, ships, previous_targets, threat)
+    assigned = solve_assignment(costs, time_limit=time_limit)
+    return {ship.id: targets[col] for ship, col in zip(ships, assigned) if col >= 0}
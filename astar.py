@@ -2,9 +2,19 @@ import heapq
 import logging
 import math
 
+import numpy as np
+
+from hlt import constants, instrumentation
 from hlt.entity import Position
 from hlt.game_map import Map
 
+# Suchmodi von AStar.find_path
+MODE_UNIFORM = "uniform"  # ursprüngliche Suche: 4er-Nachbarschaft, sortiert nach Entfernung zum Start
+MODE_ASTAR = "astar"  # A* mit Octile-Heuristik, geschlossener Menge und 8er-Nachbarschaft
+MODE_THETA = "theta"  # Lazy Theta*: beliebige Winkel, gerade Teilstrecken mit Sichtlinienprüfung gegen die Planeten
+
+SQRT_2 = math.sqrt(2)
+
 
 class AStar:
     def __init__(self, game_map: Map):
@@ -13,32 +23,45 @@ class AStar:
         self.height = game_map.height
         self.planets = game_map.all_planets()
         self._create_obstacle_map()
+        # für Theta*: Planeten um den Sicherheitsabstand der Sichtlinienprüfung vergrößert, damit kein Knoten so nah
+        # an einem Planeten liegt, dass schon die Strecke zu seinem Nachbarn die Sichtlinienprüfung nicht besteht
+        self.inflated_obstacle_map = self._rasterize_planets(constants.SHIP_CLEARANCE)
+        self._planet_circles = [(planet.x, planet.y, planet.radius + constants.SHIP_CLEARANCE)
+                                for planet in self.planets]
 
-    def _create_empty_2d_map(self):
-        return [[0 for x in range(self.width)] for y in range(self.height)]
+        # Anzahl expandierter Knoten (letzte Anfrage und Summe je Suchmodus), um die Suchmodi vergleichen zu können
+        self.last_expanded_nodes = 0
+        self.expanded_nodes = {MODE_UNIFORM: 0, MODE_ASTAR: 0, MODE_THETA: 0}
 
     def _create_obstacle_map(self):
-        self.obstacle_map = self._create_empty_2d_map()
-        for y in range(self.height):
-            for x in range(self.width):
-                for planet in self.planets:
-                    if math.pow(x - planet.x, 2) + math.pow(y - planet.y, 2) < math.pow(planet.radius, 2):
-                        self.obstacle_map[y][x] = 1
-
-    def _create_cost_map(self, start_x, start_y, goal_x, goal_y):
-        costs_map = self._create_empty_2d_map()
+        # Boolean-Raster (Zeile = y, Spalte = x); True markiert eine Zelle innerhalb eines Planeten
+        self.obstacle_map = self._rasterize_planets(0)
+
+    def _rasterize_planets(self, margin):
+        # True markiert eine Zelle, die weniger als Radius + margin vom Mittelpunkt eines Planeten entfernt ist
+        obstacle_map = np.zeros((self.height, self.width), dtype=bool)
+
+        for planet in self.planets:
+            radius = planet.radius + margin
+            # nur das umgebende Rechteck des Planeten betrachten, nicht die ganze Karte
+            x_min = max(int(math.floor(planet.x - radius)), 0)
+            x_max = min(int(math.ceil(planet.x + radius)) + 1, self.width)
+            y_min = max(int(math.floor(planet.y - radius)), 0)
+            y_max = min(int(math.ceil(planet.y + radius)) + 1, self.height)
+
+            if x_min >= x_max or y_min >= y_max:
+                continue
 
-        for y in range(self.height):
-            for x in range(self.height):
-                distance = math.sqrt(
-                    math.pow(x - start_x, 2) +
-                    math.pow(y - start_y, 2)
-                )
+            xs = np.arange(x_min, x_max) - planet.x
+            ys = np.arange(y_min, y_max)[:, np.newaxis] - planet.y
+            obstacle_map[y_min:y_max, x_min:x_max] |= xs ** 2 + ys ** 2 < radius ** 2
 
-                costs = math.ceil(distance)
-                costs_map[y][x] = costs
+        return obstacle_map
 
-        return costs_map
+    @staticmethod
+    def _cell_costs(x, y, start_x, start_y):
+        # Kosten einer Zelle = aufgerundete Entfernung zum Start; wird nur für tatsächlich besuchte Zellen berechnet
+        return math.ceil(math.hypot(x - start_x, y - start_y))
 
     def _get_neighbouring_cells(self, x, y):
         neighbours = []
@@ -55,7 +78,7 @@ class AStar:
                 neighbours.append((x, y + 1))
 
         elif x == self.width - 1:
-            neighbours.append((x, y))
+            neighbours.append((x - 1, y))
 
             if y == 0:
                 neighbours.append((x, 1))
@@ -79,6 +102,79 @@ class AStar:
 
         return neighbours
 
+    def _get_neighbouring_cells_8(self, x, y, obstacle_map=None):
+        # freie Nachbarzellen inkl. Diagonalen als (x, y, Schrittkosten)
+        if obstacle_map is None:
+            obstacle_map = self.obstacle_map
+        neighbours = []
+
+        for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)):
+            next_x, next_y = x + dx, y + dy
+
+            if not (0 <= next_x < self.width and 0 <= next_y < self.height):
+                continue
+            if obstacle_map[next_y, next_x]:
+                continue
+
+            if dx and dy:
+                # keine Ecken eines Planeten abschneiden
+                if obstacle_map[y, next_x] or obstacle_map[next_y, x]:
+                    continue
+                neighbours.append((next_x, next_y, SQRT_2))
+            else:
+                neighbours.append((next_x, next_y, 1))
+
+        return neighbours
+
+    @staticmethod
+    def _octile_distance(x, y, goal_x, goal_y):
+        # zulässige Heuristik für die 8er-Nachbarschaft
+        dx = abs(x - goal_x)
+        dy = abs(y - goal_y)
+        return dx + dy + (SQRT_2 - 2) * min(dx, dy)
+
+    def _line_of_sight(self, a, b):
+        # prüft, ob die Strecke von a nach b an allen Planeten (plus Schiffsradius) vorbeiführt
+        ax, ay = a
+        dx = b[0] - ax
+        dy = b[1] - ay
+        length_sq = dx * dx + dy * dy
+
+        for circle_x, circle_y, radius in self._planet_circles:
+            if length_sq == 0:
+                t = 0.0
+            else:
+                # Parameter des Punktes der Strecke, der dem Planeten am nächsten ist
+                t = ((circle_x - ax) * dx + (circle_y - ay) * dy) / length_sq
+                if t < 0:
+                    # Strecke führt vom Planeten weg (wie in collision.intersect_segment_circle)
+                    continue
+                t = min(t, 1.0)
+
+            closest_x = ax + t * dx - circle_x
+            closest_y = ay + t * dy - circle_y
+            if closest_x * closest_x + closest_y * closest_y <= radius * radius:
+                return False
+
+        return True
+
+    def _pull_string(self, path):
+        # nur Wegpunkte behalten, von denen aus der nächste behaltene Punkt nicht direkt sichtbar ist
+        if len(path) < 3:
+            return path
+
+        pulled_path = [path[0]]
+        i = 0
+
+        while i < len(path) - 1:
+            j = len(path) - 1
+            while j > i + 1 and not self._line_of_sight(path[i], path[j]):
+                j -= 1
+            pulled_path.append(path[j])
+            i = j
+
+        return pulled_path
+
     # function to calculate if a Point p is in a line specified by two Points a and b
     # @params: a, b     -   two points specifying a line
     #           p       -   a Point tested if on the line
@@ -90,7 +186,7 @@ class AStar:
         # Falls x-Werte gleich:
         if b.x == a.x:
             if b.y == a.y:
-                logging.info(f"Die Punkte {a} und {b} sind verbotenerweise identisch!")
+                logging.info("Die Punkte %s und %s sind verbotenerweise identisch!", a, b)
             return abs(p.x - a.x) <= 1.1
         # Falls nur y-Werte gleich:
         if b.y == a.y:
@@ -152,13 +248,12 @@ class AStar:
 
         return shortened_path
 
-    def find_path(self, start_x: int, start_y: int, goal_x: int, goal_y: int):
-        costs_map = self._create_cost_map(start_x, start_y, goal_x, goal_y)
-        start = (start_x, start_y)
-        goal = (goal_x, goal_y)
+    def _search_uniform(self, start, goal, cost_layer=None):
+        start_x, start_y = start
         frontier = []
         came_from = dict()
         cost_so_far = dict()
+        expanded_nodes = 0
 
         # Startwert hinzuzufügen
         heapq.heappush(frontier, (0, start))
@@ -169,6 +264,7 @@ class AStar:
         while frontier:
             (priority, (current_node_x, current_node_y)) = heapq.heappop(frontier)
             current_node = (current_node_x, current_node_y)
+            expanded_nodes += 1
 
             if current_node == goal:
                 break
@@ -177,11 +273,13 @@ class AStar:
                 next_node = (next_node_x, next_node_y)
 
                 # prüfen, ob Nachbar kein Planet ist
-                if self.obstacle_map[next_node_y][next_node_x] == 1:
+                if self.obstacle_map[next_node_y, next_node_x]:
                     continue
 
                 # Kosten für diese Zelle berechnen
-                cell_costs = costs_map[next_node_y][next_node_x]
+                cell_costs = self._cell_costs(next_node_x, next_node_y, start_x, start_y)
+                if cost_layer is not None:
+                    cell_costs += cost_layer[next_node_y, next_node_x]
                 path_costs = cost_so_far[current_node] + cell_costs
 
                 # wenn dieser Pfad zu der Zelle der günstigste zu dieser ist
@@ -194,10 +292,158 @@ class AStar:
                     heapq.heappush(frontier, next_node_heap)
                     came_from[next_node] = current_node
 
+        return came_from, expanded_nodes
+
+    def _search_astar(self, start, goal, cost_layer=None):
+        goal_x, goal_y = goal
+        frontier = []
+        came_from = {start: None}
+        cost_so_far = {start: 0}
+        closed = set()
+        expanded_nodes = 0
+
+        # Einträge: (f, h, g, Zelle) - bei gleichem f wird die Zelle näher am Ziel bevorzugt
+        start_h = self._octile_distance(start[0], start[1], goal_x, goal_y)
+        heapq.heappush(frontier, (start_h, start_h, 0, start))
+
+        while frontier:
+            _, _, current_costs, current_node = heapq.heappop(frontier)
+
+            # veraltete Heap-Einträge überspringen
+            if current_node in closed:
+                continue
+            closed.add(current_node)
+            expanded_nodes += 1
+
+            if current_node == goal:
+                break
+
+            for next_node_x, next_node_y, step_costs in self._get_neighbouring_cells_8(*current_node):
+                next_node = (next_node_x, next_node_y)
+
+                if next_node in closed:
+                    continue
+
+                path_costs = current_costs + step_costs
+                if cost_layer is not None:
+                    # Zusatzkosten beim Betreten der Zelle; nicht negativ, die Heuristik bleibt also zulässig
+                    path_costs += cost_layer[next_node_y, next_node_x]
+
+                if next_node not in cost_so_far or path_costs < cost_so_far[next_node]:
+                    cost_so_far[next_node] = path_costs
+                    came_from[next_node] = current_node
+                    h = self._octile_distance(next_node_x, next_node_y, goal_x, goal_y)
+                    heapq.heappush(frontier, (path_costs + h, h, path_costs, next_node))
+
+        return came_from, expanded_nodes
+
+    def _search_theta(self, start, goal):
+        goal_x, goal_y = goal
+        obstacle_map = self.inflated_obstacle_map
+        frontier = []
+        came_from = {start: None}
+        cost_so_far = {start: 0}
+        closed = set()
+        expanded_nodes = 0
+
+        start_h = math.hypot(start[0] - goal_x, start[1] - goal_y)
+        heapq.heappush(frontier, (start_h, start_h, 0, start))
+
+        while frontier:
+            _, _, current_costs, current_node = heapq.heappop(frontier)
+
+            if current_node in closed or current_node not in cost_so_far or current_costs > cost_so_far[current_node]:
+                continue
+
+            # Lazy Theta*: Sichtlinie zum Vorgänger erst beim Expandieren prüfen
+            parent = came_from[current_node]
+            if parent is not None and not self._line_of_sight(parent, current_node):
+                # auf den besten bereits expandierten Gitternachbarn zurückfallen
+                best_parent, best_costs = None, math.inf
+                for next_node_x, next_node_y, step_costs in self._get_neighbouring_cells_8(*current_node, obstacle_map):
+                    neighbour = (next_node_x, next_node_y)
+                    if neighbour in closed and cost_so_far[neighbour] + step_costs < best_costs:
+                        best_parent, best_costs = neighbour, cost_so_far[neighbour] + step_costs
+                if best_parent is None:
+                    # kein gültiger Vorgänger: Knoten verwerfen, er kann noch über einen anderen Weg erreicht werden
+                    del came_from[current_node]
+                    del cost_so_far[current_node]
+                    continue
+                came_from[current_node] = best_parent
+                cost_so_far[current_node] = current_costs = best_costs
+
+            closed.add(current_node)
+            expanded_nodes += 1
+
+            if current_node == goal:
+                break
+
+            # Nachbarn werden direkt mit dem Vorgänger des aktuellen Knotens verbunden (falls vorhanden)
+            parent = came_from[current_node]
+            if parent is None:
+                parent, parent_costs = current_node, current_costs
+            else:
+                parent_costs = cost_so_far[parent]
+
+            for next_node_x, next_node_y, _ in self._get_neighbouring_cells_8(*current_node, obstacle_map):
+                next_node = (next_node_x, next_node_y)
+
+                if next_node in closed:
+                    continue
+
+                path_costs = parent_costs + math.hypot(next_node_x - parent[0], next_node_y - parent[1])
+
+                if next_node not in cost_so_far or path_costs < cost_so_far[next_node]:
+                    cost_so_far[next_node] = path_costs
+                    came_from[next_node] = parent
+                    h = math.hypot(next_node_x - goal_x, next_node_y - goal_y)
+                    heapq.heappush(frontier, (path_costs + h, h, path_costs, next_node))
+
+        return came_from, expanded_nodes
+
+    @instrumentation.timed("AStar.find_path")
+    def find_path(self, start_x: int, start_y: int, goal_x: int, goal_y: int, mode: str = MODE_ASTAR,
+                  cost_layer: np.ndarray = None):
+        """
+        :param cost_layer: optionale Zusatzkosten pro Zelle (Zeile = y, Spalte = x, nicht negativ), z.B.
+            hlt.threat.ThreatField.cost_layer(), um Gebiete unter gegnerischem Beschuss zu meiden
+        """
+        start = (start_x, start_y)
+        goal = (goal_x, goal_y)
+
+        # Theta* sucht auf den vergrößerten Planeten, siehe _search_theta
+        obstacle_map = self.inflated_obstacle_map if mode == MODE_THETA else self.obstacle_map
+
+        # Ziel liegt in einem Planeten (oder außerhalb der Karte) - es gibt keinen Weg
+        if not (0 <= goal_x < self.width and 0 <= goal_y < self.height) or obstacle_map[goal_y, goal_x]:
+            self.last_expanded_nodes = 0
+            return []
+
+        if mode == MODE_THETA and cost_layer is not None:
+            # gerade Teilstrecken überspringen Zellen, deren Kosten dann nicht gezählt würden
+            raise ValueError("Zusatzkosten werden im Suchmodus theta nicht unterstützt")
+
+        if mode == MODE_UNIFORM:
+            came_from, expanded_nodes = self._search_uniform(start, goal, cost_layer)
+        elif mode == MODE_ASTAR:
+            came_from, expanded_nodes = self._search_astar(start, goal, cost_layer)
+        elif mode == MODE_THETA:
+            came_from, expanded_nodes = self._search_theta(start, goal)
+        else:
+            raise ValueError(f"Unbekannter Suchmodus: {mode}")
+
+        self.last_expanded_nodes = expanded_nodes
+        self.expanded_nodes[mode] += expanded_nodes
+        if instrumentation.enabled:
+            instrumentation.count(f"astar.expanded_nodes.{mode}", expanded_nodes)
+
+        if goal not in came_from:
+            return []
+
         # Pfad vom Ziel zum Start ermitteln
         cell, path = goal, [goal]
 
-        while cell is not start:
+        while cell != start:
 
             predecessor = came_from[cell]
 
@@ -209,6 +455,11 @@ class AStar:
 
         # Pfad umdrehen, damit er vom Start zum Ziel geht
         path.reverse()
-        path = self._shorten_path(path)
+
+        if mode == MODE_THETA:
+            # Teilstrecken sind bereits gerade, nur noch überflüssige Zwischenpunkte entfernen
+            path = self._pull_string(path)
+        else:
+            path = self._shorten_path(path)
 
         return path
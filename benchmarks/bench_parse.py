@@ -0,0 +1,62 @@
+"""
+Microbenchmark for Map._parse: parse time of one frame against the number of ships in it.
+
+Usage: python benchmarks/bench_parse.py [--repeat N]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from hlt import game_map  # noqa: E402
+
+SHIP_COUNTS = (10, 50, 100, 200, 400, 800, 1600)
+NUM_PLAYERS = 4
+NUM_PLANETS = 30
+WIDTH, HEIGHT = 240, 160
+
+
+def make_frame(num_ships, seed=0):
+    """
+    Build a frame in the engine's format with num_ships ships spread over NUM_PLAYERS players.
+
+    :param int num_ships: Total number of ships in the frame
+    :param int seed: Random seed
+    :return: The frame string
+    :rtype: str
+    """
+    rnd = random.Random(seed)
+    tokens = [str(NUM_PLAYERS)]
+    ship_id = 0
+    for player_id in range(NUM_PLAYERS):
+        ships = num_ships // NUM_PLAYERS + (1 if player_id < num_ships % NUM_PLAYERS else 0)
+        tokens += [str(player_id), str(ships)]
+        for _ in range(ships):
+            tokens += [str(ship_id), "{:.4f}".format(rnd.uniform(0, WIDTH)), "{:.4f}".format(rnd.uniform(0, HEIGHT)),
+                       "255", "0.0000", "0.0000", "0", "0", "0", "0"]
+            ship_id += 1
+    tokens.append(str(NUM_PLANETS))
+    for planet_id in range(NUM_PLANETS):
+        tokens += [str(planet_id), "{:.4f}".format(rnd.uniform(0, WIDTH)), "{:.4f}".format(rnd.uniform(0, HEIGHT)),
+                   "2000", "{:.4f}".format(rnd.uniform(3, 10)), "4", "0", "1000", "0", "0", "0"]
+    return " ".join(tokens)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50, help="number of parses per frame size")
+    args = parser.parse_args()
+
+    print("{:>8} {:>12} {:>16}".format("ships", "ms/parse", "us/entity"))
+    for num_ships in SHIP_COUNTS:
+        frame = make_frame(num_ships)
+        game = game_map.Map(0, WIDTH, HEIGHT)
+        seconds = min(timeit.repeat(lambda: game._parse(frame), number=args.repeat, repeat=3)) / args.repeat
+        print("{:>8} {:>12.3f} {:>16.2f}".format(num_ships, seconds * 1e3, seconds * 1e6 / (num_ships + NUM_PLANETS)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""
+Summary of instrumentation sidecar files (see hlt.instrumentation): per-turn mean, percentiles and maximum of every
+timer and counter, over all turns of all given files.
+
+Usage: python benchmarks/instrumentation_report.py stats.jsonl [more.jsonl ...]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from hlt import instrumentation  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="sidecar files written with JARVIS_INSTRUMENTATION")
+    args = parser.parse_args()
+    instrumentation.report(args.files)
+
+
+if __name__ == "__main__":
+    main()
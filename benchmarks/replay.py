@@ -0,0 +1,175 @@
+"""
+Offline replay of a recorded game: feeds the recorded engine input through the bot (same code path as against the
+engine, but in-process and without the engine) and reports the per-turn latency, the peak memory and the commands.
+
+Record a game with JARVIS_RECORD_FRAMES=game.frames.gz (see Jarvis.py), then replay it with
+Usage: python benchmarks/replay.py game.frames.gz [--bot Jarvis.py] [--commands commands.txt] [--turns N]
+"""
+import argparse
+import io
+import logging
+import os
+import re
+import runpy
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, ROOT)
+
+from hlt import recording  # noqa: E402
+
+#: Number of engine lines sent before the first turn (tag, map size, initial frame)
+NUM_SETUP_LINES = 3
+PERCENTILES = (50, 90, 99)
+#: One command: its letter followed by its numeric arguments
+COMMAND_PATTERN = re.compile(r"[a-z](?: -?[\d.]+)+")
+
+
+class ReplayInput(io.TextIOBase):
+    """
+    Stands in for sys.stdin: returns the recorded engine lines one by one and notes when each was read.
+    """
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._position = 0
+        self.read_at = None
+
+    def readline(self, size=-1):
+        if self._position >= len(self._lines):
+            return ""
+        line = self._lines[self._position]
+        self._position += 1
+        self.read_at = time.perf_counter()
+        return line + "\n"
+
+
+class CommandOutput(io.TextIOBase):
+    """
+    Stands in for sys.stdout: collects everything the bot sends, one entry per finished line, and the time from
+    reading the last engine line to finishing each one.
+    """
+
+    def __init__(self, replay_input):
+        self._input = replay_input
+        self._buffer = []
+        self.lines = []
+        self.latencies = []
+
+    def write(self, s):
+        self._buffer.append(s)
+        if "\n" in s:
+            finished = time.perf_counter()
+            text = "".join(self._buffer)
+            lines = text.split("\n")
+            self._buffer = [lines.pop()]
+            for line in lines:
+                self.lines.append(line)
+                self.latencies.append(finished - self._input.read_at)
+        return len(s)
+
+
+def percentile(values, percent):
+    """
+    :param list[float] values: The samples
+    :param float percent: The percentile in [0, 100]
+    :return: The percentile (nearest rank)
+    :rtype: float
+    """
+    ordered = sorted(values)
+    rank = max(int(round(percent / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def peak_memory_mb():
+    """
+    :return: The peak resident set size of this process in MB, or None if it cannot be determined
+    :rtype: float
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def replay(bot, lines):
+    """
+    Run the bot script on the recorded lines until the input is exhausted.
+
+    :param str bot: Path of the bot script
+    :param list[str] lines: The recorded engine lines
+    :return: The captured output (first line is the bot name, then one line of commands per turn)
+    :rtype: CommandOutput
+    """
+    replay_input = ReplayInput(lines)
+    output = CommandOutput(replay_input)
+    stdin, stdout, argv = sys.stdin, sys.stdout, sys.argv
+    sys.stdin, sys.stdout, sys.argv = replay_input, output, [bot]
+    sys.path.insert(0, os.path.dirname(os.path.abspath(bot)))
+    try:
+        runpy.run_path(bot, run_name="__main__")
+    except EOFError:
+        pass
+    finally:
+        sys.stdin, sys.stdout, sys.argv = stdin, stdout, argv
+        sys.path.pop(0)
+        logging.shutdown()
+    return output
+
+
+def split_commands(line):
+    """
+    :param str line: One turn of commands as sent to the engine (the commands are not separated, e.g. "t 1 7 90d 2 0")
+    :return: The single commands
+    :rtype: list[str]
+    """
+    return COMMAND_PATTERN.findall(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", help="recorded game (see hlt.recording)")
+    parser.add_argument("--bot", default=os.path.join(ROOT, "Jarvis.py"), help="bot script to replay")
+    parser.add_argument("--commands", help="file to write the commands of every turn to")
+    parser.add_argument("--turns", type=int, help="replay only the first N turns")
+    args = parser.parse_args()
+
+    lines = recording.read_frames(args.recording)
+    if len(lines) < NUM_SETUP_LINES:
+        parser.error("{} does not contain a complete game setup".format(args.recording))
+    if args.turns is not None:
+        lines = lines[:NUM_SETUP_LINES + args.turns]
+
+    output = replay(args.bot, lines)
+    if not output.lines:
+        print("The bot did not finish its setup")
+        return
+
+    setup_time, turn_latencies = output.latencies[0], output.latencies[1:]
+    commands = output.lines[1:]
+    print("bot name:        {}".format(output.lines[0]))
+    print("setup:           {:.1f} ms".format(setup_time * 1e3))
+    print("turns:           {} of {}".format(len(turn_latencies), len(lines) - NUM_SETUP_LINES))
+    if turn_latencies:
+        print("turn latency:    " + "  ".join("p{} {:.1f} ms".format(p, percentile(turn_latencies, p) * 1e3)
+                                              for p in PERCENTILES)
+              + "  max {:.1f} ms".format(max(turn_latencies) * 1e3))
+    memory = peak_memory_mb()
+    print("peak memory:     {}".format("{:.1f} MB".format(memory) if memory is not None else "n/a"))
+    print("commands:        {}".format(sum(len(split_commands(line)) for line in commands)))
+
+    if args.commands:
+        with open(args.commands, "w") as file:
+            for line in commands:
+                file.write(line + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
-from .entity import Position, Entity
+import math
+
+import numpy as np
 
 
 def intersect_segment_circle(start, end, circle, *, fudge=0.5):
@@ -26,7 +28,7 @@ def intersect_segment_circle(start, end, circle, *, fudge=0.5):
 
     if a == 0.0:
         # Start and end are the same point
-        return start.calculate_distance_between(circle) <= circle.radius + fudge
+        return math.sqrt(c) <= circle.radius + fudge
 
     # Time along segment when closest to the circle (vertex of the quadratic)
     t = min(-b / (2 * a), 1.0)
@@ -35,6 +37,56 @@ def intersect_segment_circle(start, end, circle, *, fudge=0.5):
 
     closest_x = start.x + dx * t
     closest_y = start.y + dy * t
-    closest_distance = Position(closest_x, closest_y).calculate_distance_between(circle)
+    closest_distance = math.hypot(closest_x - circle.x, closest_y - circle.y)
 
     return closest_distance <= circle.radius + fudge
+
+
+def intersect_segments_circles(start_x, start_y, end_x, end_y, circle_x, circle_y, circle_radius, *, fudge=0.5):
+    """
+    Test a batch of line segments against a batch of circles in one vectorized call. Follows the same rules as
+    intersect_segment_circle, including that a segment starting inside a circle but pointing away from its centre
+    does not intersect it. Start and end coordinates may be scalars, so a fan of candidate segments from one point
+    can be tested at once.
+
+    :param start_x: x-coordinates of the segment starts, scalar or shape (S,)
+    :param start_y: y-coordinates of the segment starts, scalar or shape (S,)
+    :param end_x: x-coordinates of the segment ends, scalar or shape (S,)
+    :param end_y: y-coordinates of the segment ends, scalar or shape (S,)
+    :param circle_x: x-coordinates of the circle centres, shape (C,)
+    :param circle_y: y-coordinates of the circle centres, shape (C,)
+    :param circle_radius: Radii of the circles, shape (C,)
+    :param float fudge: A fudge factor; additional distance to leave between the segments and circles.
+    :return: Hit mask of shape (S, C), and for every segment the distance from its start to the first point where it
+        enters any circle (inf if it hits none)
+    :rtype: (numpy.ndarray, numpy.ndarray)
+    """
+    start_x, start_y, end_x, end_y = np.broadcast_arrays(*(np.atleast_1d(np.asarray(value, dtype=float))
+                                                           for value in (start_x, start_y, end_x, end_y)))
+    start_x, start_y = start_x[:, np.newaxis], start_y[:, np.newaxis]
+    dx = end_x[:, np.newaxis] - start_x
+    dy = end_y[:, np.newaxis] - start_y
+    to_circle_x = np.asarray(circle_x, dtype=float)[np.newaxis, :] - start_x
+    to_circle_y = np.asarray(circle_y, dtype=float)[np.newaxis, :] - start_y
+    radius = np.asarray(circle_radius, dtype=float)[np.newaxis, :] + fudge
+
+    length_sq = dx * dx + dy * dy
+    degenerate = length_sq == 0.0
+    safe_length_sq = np.where(degenerate, 1.0, length_sq)
+    # Time along segment when closest to the circle
+    t = np.where(degenerate, 0.0, (to_circle_x * dx + to_circle_y * dy) / safe_length_sq)
+    t_clamped = np.minimum(t, 1.0)
+
+    closest_x = dx * t_clamped - to_circle_x
+    closest_y = dy * t_clamped - to_circle_y
+    hits = (t >= 0) & (closest_x * closest_x + closest_y * closest_y <= radius * radius)
+
+    # Entry point: step back from the closest approach of the (infinite) line by the half chord
+    length = np.sqrt(length_sq)
+    line_x = dx * t - to_circle_x
+    line_y = dy * t - to_circle_y
+    half_chord = np.sqrt(np.maximum(radius * radius - (line_x * line_x + line_y * line_y), 0.0))
+    entry = np.maximum(t * length - half_chord, 0.0)
+    nearest = np.where(hits, entry, np.inf).min(axis=1) if hits.shape[1] else np.full(hits.shape[0], np.inf)
+
+    return hits, nearest
@@ -0,0 +1,144 @@
+import numpy as np
+
+from . import constants
+
+#: Owner value used for entities without an owner
+NO_OWNER = -1
+#: Docking status value used for planets
+NO_DOCKING_STATUS = -1
+
+
+class EntityColumns:
+    """
+    Structure-of-arrays view of a list of entities, one NumPy array per attribute. Row i of every array describes
+    entities[i].
+
+    :ivar entities: The entities, in row order
+    :ivar ids: Entity ids
+    :ivar x: x-coordinates
+    :ivar y: y-coordinates
+    :ivar radius: Radii
+    :ivar health: Health
+    :ivar owner: Owner player ids (NO_OWNER if not owned)
+    :ivar docking_status: Docking status values of ships (NO_DOCKING_STATUS for planets)
+    :ivar cooldown: Weapon cooldown of ships (0 for planets)
+    :ivar vel_x: Velocity of ships along the x-axis (0 for planets)
+    :ivar vel_y: Velocity of ships along the y-axis (0 for planets)
+    """
+
+    _FIELDS = ("ids", "x", "y", "radius", "health", "owner", "docking_status", "cooldown", "vel_x", "vel_y")
+
+    def __init__(self, entities, rows=None):
+        """
+        :param list[entity.Entity] entities: The (linked) ships or planets to store
+        :param numpy.ndarray rows: Precomputed (len(entities), 10) array of the columns (optional)
+        """
+        self.entities = list(entities)
+        if rows is None:
+            rows = np.array([_row(entity) for entity in self.entities], dtype=float).reshape(-1, len(self._FIELDS))
+        self.ids = rows[:, 0].astype(int)
+        self.x = rows[:, 1]
+        self.y = rows[:, 2]
+        self.radius = rows[:, 3]
+        self.health = rows[:, 4]
+        self.owner = rows[:, 5].astype(int)
+        self.docking_status = rows[:, 6].astype(int)
+        self.cooldown = rows[:, 7]
+        self.vel_x = rows[:, 8]
+        self.vel_y = rows[:, 9]
+
+    def __len__(self):
+        return len(self.entities)
+
+    def subset(self, mask):
+        """
+        :param numpy.ndarray mask: Boolean mask or index array over the rows
+        :return: The selected rows as new columns
+        :rtype: EntityColumns
+        """
+        indices = np.arange(len(self.entities))[mask]
+        rows = np.column_stack([getattr(self, field)[indices] for field in self._FIELDS]).astype(float)
+        return EntityColumns([self.entities[i] for i in indices], rows.reshape(-1, len(self._FIELDS)))
+
+
+def _row(entity):
+    """
+    :param entity.Entity entity: A linked ship or planet
+    :return: The column values of the entity
+    :rtype: tuple
+    """
+    owner = entity.owner.id if entity.owner is not None else NO_OWNER
+    docking_status = getattr(entity, "docking_status", None)
+    return (entity.id, entity.x, entity.y, entity.radius, entity.health, owner,
+            docking_status if docking_status is not None else NO_DOCKING_STATUS,
+            getattr(entity, "_weapon_cooldown", 0), getattr(entity, "vel_x", 0), getattr(entity, "vel_y", 0))
+
+
+def distance_matrix(sources, targets):
+    """
+    Centre distances between all pairs in one call.
+
+    :param EntityColumns sources: The source entities (S rows)
+    :param EntityColumns targets: The target entities (T rows)
+    :return: (S, T) matrix of distances
+    :rtype: numpy.ndarray
+    """
+    return np.hypot(targets.x[np.newaxis, :] - sources.x[:, np.newaxis],
+                    targets.y[np.newaxis, :] - sources.y[:, np.newaxis])
+
+
+def angle_matrix(sources, targets):
+    """
+    Angles from every source to every target in one call, in degrees (same convention as
+    :func:`entity.Entity.calculate_angle_between`).
+
+    :param EntityColumns sources: The source entities (S rows)
+    :param EntityColumns targets: The target entities (T rows)
+    :return: (S, T) matrix of angles in [0, 360)
+    :rtype: numpy.ndarray
+    """
+    return np.degrees(np.arctan2(targets.y[np.newaxis, :] - sources.y[:, np.newaxis],
+                                 targets.x[np.newaxis, :] - sources.x[:, np.newaxis])) % 360
+
+
+def intercept_matrix(sources, targets, speed=constants.MAX_SPEED, max_turns=None):
+    """
+    Earliest interception of every target by every source in one call, assuming every target keeps its velocity and
+    every source flies straight at the given speed. Solves |d + v * t| = speed * t for the smallest t >= 0, with d the
+    offset from source to target and v the target's velocity.
+
+    :param EntityColumns sources: The pursuing entities (S rows)
+    :param EntityColumns targets: The targets (T rows)
+    :param float speed: The speed of the sources per turn
+    :param float max_turns: Targets that cannot be caught within this many turns count as not catchable (optional;
+        a target barely slower than the sources is only caught far away)
+    :return: (S, T) matrices of the intercept x- and y-coordinates and of the number of whole turns needed to get
+        there (inf, with the target's current position as point, where the target cannot be caught)
+    :rtype: (numpy.ndarray, numpy.ndarray, numpy.ndarray)
+    """
+    dx = targets.x[np.newaxis, :] - sources.x[:, np.newaxis]
+    dy = targets.y[np.newaxis, :] - sources.y[:, np.newaxis]
+    vx = np.broadcast_to(targets.vel_x[np.newaxis, :], dx.shape)
+    vy = np.broadcast_to(targets.vel_y[np.newaxis, :], dx.shape)
+
+    a = vx * vx + vy * vy - speed * speed
+    b = 2 * (dx * vx + dy * vy)
+    c = dx * dx + dy * dy
+    discriminant = b * b - 4 * a * c
+    root = np.sqrt(np.maximum(discriminant, 0))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # both roots of the quadratic; for a == 0 (target as fast as the source) the equation is linear
+        first = np.where(a != 0, (-b - root) / (2 * a), np.where(b < 0, -c / b, np.inf))
+        second = np.where(a != 0, (-b + root) / (2 * a), np.inf)
+    first = np.where(first >= 0, first, np.inf)
+    second = np.where(second >= 0, second, np.inf)
+    time = np.where((discriminant >= 0) | (a == 0), np.minimum(first, second), np.inf)
+    time = np.where(c == 0, 0.0, time)
+
+    if max_turns is not None:
+        time = np.where(time <= max_turns, time, np.inf)
+    reachable = np.isfinite(time)
+    safe_time = np.where(reachable, time, 0.0)
+    return (targets.x[np.newaxis, :] + vx * safe_time, targets.y[np.newaxis, :] + vy * safe_time,
+            np.where(reachable, np.ceil(time), np.inf))
@@ -0,0 +1,102 @@
+class CommandBuffer:
+    """
+    The commands of one turn, keyed by ship id. The engine rejects a turn with more than one command for the same
+    ship, so only one command per ship is kept: a later command replaces an earlier one unless the earlier one has a
+    higher priority. The turn is encoded into one string and sent with a single write.
+
+    :ivar dropped_duplicates: Number of commands dropped because the ship already had the same command or one of a
+        higher priority
+    :ivar replaced: Number of commands replaced by a different command of at least the same priority
+    """
+
+    def __init__(self):
+        self._commands = {}
+        self._priorities = {}
+        self.dropped_duplicates = 0
+        self.replaced = 0
+
+    def __len__(self):
+        return len(self._commands)
+
+    def __iter__(self):
+        return iter(self._commands.values())
+
+    def add(self, command, priority=0):
+        """
+        Add a command string as created by :class:`entity.Ship` (thrust, dock or undock).
+
+        :param str command: The command
+        :param int priority: The command replaces an earlier command of the same ship only if its priority is at
+            least as high
+        :return: True if the command was kept (or was already there)
+        :rtype: bool
+        """
+        ship_id = int(command.split(" ", 2)[1])
+        if ship_id in self._commands:
+            previous_priority = self._priorities[ship_id]
+            if command == self._commands[ship_id] or priority < previous_priority:
+                self.dropped_duplicates += 1
+                if command == self._commands[ship_id]:
+                    self._priorities[ship_id] = max(priority, previous_priority)
+                    return True
+                return False
+            self.replaced += 1
+            # keep the order in which the ships were commanded
+            del self._commands[ship_id]
+        self._commands[ship_id] = command
+        self._priorities[ship_id] = priority
+        return True
+
+    def thrust(self, ship, magnitude, angle, priority=0):
+        """
+        :param entity.Ship ship: The ship to move
+        :param int magnitude: The speed through which to move the ship
+        :param int angle: The angle to move the ship in
+        :param int priority: See :func:`add`
+        :return: True if the command was kept
+        :rtype: bool
+        """
+        return self.add(ship.thrust(magnitude, angle), priority)
+
+    def dock(self, ship, planet, priority=0):
+        """
+        :param entity.Ship ship: The ship to dock
+        :param entity.Planet planet: The planet to dock to
+        :param int priority: See :func:`add`
+        :return: True if the command was kept
+        :rtype: bool
+        """
+        return self.add(ship.dock(planet), priority)
+
+    def undock(self, ship, priority=0):
+        """
+        :param entity.Ship ship: The ship to undock
+        :param int priority: See :func:`add`
+        :return: True if the command was kept
+        :rtype: bool
+        """
+        return self.add(ship.undock(), priority)
+
+    def get(self, ship):
+        """
+        :param entity.Ship ship: The ship
+        :return: The command kept for the ship, or None
+        :rtype: str
+        """
+        return self._commands.get(ship.id)
+
+    def clear(self):
+        """
+        Drop all commands, e.g. at the start of a new turn (the counters are kept).
+
+        :return: nothing
+        """
+        self._commands.clear()
+        self._priorities.clear()
+
+    def encode(self):
+        """
+        :return: All commands as one string in the engine's format (commands are not separated)
+        :rtype: str
+        """
+        return "".join(self._commands.values())
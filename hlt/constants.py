@@ -22,3 +22,7 @@ DOCK_TURNS = 5
 BASE_PRODUCTIVITY = 6
 #: Distance from the planets edge at which new ships are created
 SPAWN_RADIUS = 2.0
+#: Extra distance kept between a ship and the entities it navigates around, on top of both radii
+NAVIGATION_FUDGE = 0.1
+#: Distance a ship's centre keeps to the surface of an entity it navigates around
+SHIP_CLEARANCE = SHIP_RADIUS + NAVIGATION_FUDGE
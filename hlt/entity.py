@@ -1,8 +1,12 @@
 import logging
 import abc
 import math
-from enum import Enum
-from . import constants
+from enum import IntEnum
+from itertools import islice
+
+import numpy as np
+
+from . import collision, constants, instrumentation
 
 
 class Entity:
@@ -19,6 +23,8 @@ class Entity:
     :ivar owner: The player ID of the owner, if any. If None, Entity is not owned.
     """
     __metaclass__ = abc.ABCMeta
+    # Hundreds of entities and thousands of temporary positions are created per turn, so no instance dicts
+    __slots__ = ("x", "y", "radius", "health", "owner", "id")
 
     def __init__(self, x, y, radius, health, player, entity_id):
         self.x = x
@@ -92,6 +98,8 @@ class Planet(Entity):
     :ivar owner: The Player object of the owner, if any. Else None if Planet is not owned.
 
     """
+    __slots__ = ("num_docking_spots", "current_production", "remaining_resources", "_docked_ship_ids",
+                 "_docked_ships")
 
     def __init__(self, planet_id, x, y, hp, radius, docking_spots, current,
                  remaining, owned, owner, docked_ships):
@@ -100,6 +108,14 @@ class Planet(Entity):
         self.y = y
         self.radius = radius
         self.num_docking_spots = docking_spots
+        self._update(hp, current, remaining, owned, owner, docked_ships)
+
+    def _update(self, hp, current, remaining, owned, owner, docked_ships):
+        """
+        Overwrite the per-turn state of the planet, keeping the object (and its static geometry) in place.
+
+        :return: nothing
+        """
         self.current_production = current
         self.remaining_resources = remaining
         self.health = hp
@@ -157,22 +173,25 @@ class Planet(Entity):
                 self._docked_ships[ship] = self.owner.get_ship(ship)
 
     @staticmethod
-    def _parse_single(tokens):
+    def _parse_single(tokens, previous=None):
         """
         Parse a single planet given tokenized input from the game environment.
 
-        :return: The planet ID, planet object, and unused tokens.
-        :rtype: (int, Planet, list[str])
+        :param iterator[str] tokens: Cursor over the tokenized input; the planet's tokens are consumed from it
+        :param dict[int, Planet] previous: Planets of the last turn; if the planet is among them, it is updated in place
+        :return: The planet ID and planet object.
+        :rtype: (int, Planet)
         """
         (plid, x, y, hp, r, docking, current, remaining,
-         owned, owner, num_docked_ships, *remainder) = tokens
+         owned, owner, num_docked_ships) = islice(tokens, 11)
 
         plid = int(plid)
-        docked_ships = []
+        docked_ships = [int(ship_id) for ship_id in islice(tokens, int(num_docked_ships))]
 
-        for _ in range(int(num_docked_ships)):
-            ship_id, *remainder = remainder
-            docked_ships.append(int(ship_id))
+        planet = previous.get(plid) if previous else None
+        if planet is not None:
+            planet._update(int(hp), int(current), int(remaining), bool(int(owned)), int(owner), docked_ships)
+            return plid, planet
 
         planet = Planet(int(plid),
                         float(x), float(y),
@@ -181,26 +200,26 @@ class Planet(Entity):
                         bool(int(owned)), int(owner),
                         docked_ships)
 
-        return plid, planet, remainder
+        return plid, planet
 
     @staticmethod
-    def _parse(tokens):
+    def _parse(tokens, previous=None):
         """
         Parse planet data given a tokenized input.
 
-        :param list[str] tokens: The tokenized input
-        :return: the populated planet dict and the unused tokens.
-        :rtype: (dict, list[str])
+        :param iterator[str] tokens: Cursor over the tokenized input; the planet tokens are consumed from it
+        :param dict[int, Planet] previous: Planets of the last turn to update in place (optional)
+        :return: the populated planet dict
+        :rtype: dict
         """
-        num_planets, *remainder = tokens
-        num_planets = int(num_planets)
+        num_planets = int(next(tokens))
         planets = {}
 
         for _ in range(num_planets):
-            plid, planet, remainder = Planet._parse_single(remainder)
+            plid, planet = Planet._parse_single(tokens, previous)
             planets[plid] = planet
 
-        return planets, remainder
+        return planets
 
 
 class Ship(Entity):
@@ -212,12 +231,19 @@ class Ship(Entity):
     :ivar y: The ship y-coordinate.
     :ivar radius: The ship radius.
     :ivar health: The ship's remaining health.
+    :ivar vel_x: The ship's velocity along the x-axis, as sent by the engine.
+    :ivar vel_y: The ship's velocity along the y-axis, as sent by the engine.
     :ivar DockingStatus docking_status: The docking status (UNDOCKED, DOCKED, DOCKING, UNDOCKING)
     :ivar planet: The ID of the planet the ship is docked to, if applicable.
     :ivar owner: The player ID of the owner, if any. If None, Entity is not owned.
     """
 
-    class DockingStatus(Enum):
+    __slots__ = ("vel_x", "vel_y", "docking_status", "planet", "_docking_progress", "_weapon_cooldown")
+
+    class DockingStatus(IntEnum):
+        """
+        The docking status values in the engine's encoding. They compare and hash like the plain ints.
+        """
         UNDOCKED = 0
         DOCKING = 1
         DOCKED = 2
@@ -226,13 +252,23 @@ class Ship(Entity):
     def __init__(self, player_id, ship_id, x, y, hp, vel_x, vel_y,
                  docking_status, planet, progress, cooldown):
         self.id = ship_id
+        self.radius = constants.SHIP_RADIUS
+        self._update(player_id, x, y, hp, vel_x, vel_y, docking_status, planet, progress, cooldown)
+
+    def _update(self, player_id, x, y, hp, vel_x, vel_y, docking_status, planet, progress, cooldown):
+        """
+        Overwrite the per-turn state of the ship, keeping the object in place.
+
+        :return: nothing
+        """
         self.x = x
         self.y = y
         self.owner = player_id
-        self.radius = constants.SHIP_RADIUS
         self.health = hp
+        self.vel_x = vel_x
+        self.vel_y = vel_y
         self.docking_status = docking_status
-        self.planet = planet if (docking_status is not Ship.DockingStatus.UNDOCKED) else None
+        self.planet = planet if (docking_status != Ship.DockingStatus.UNDOCKED) else None
         self._docking_progress = progress
         self._weapon_cooldown = cooldown
 
@@ -269,15 +305,16 @@ class Ship(Entity):
         """
         return "u {}".format(self.id)
 
+    @instrumentation.timed("Ship.navigate")
     def navigate(self, target, game_map, speed, avoid_obstacles=True, max_corrections=90, angular_step=1,
-                 ignore_ships=False, ignore_planets=False):
+                 ignore_ships=False, ignore_planets=False, reservations=None):
         """
         Move a ship to a specific target position (Entity). It is recommended to place the position
         itself here, else navigate will crash into the target. If avoid_obstacles is set to True (default)
-        will avoid obstacles on the way, with up to max_corrections corrections. Note that each correction accounts
-        for angular_step degrees difference, meaning that the algorithm will naively try max_correction degrees before giving
-        up (and returning None). The navigation will only consist of up to one command; call this method again
-        in the next turn to continue navigating to the position.
+        will avoid obstacles on the way, deviating by at most (max_corrections - 1) * angular_step degrees to either
+        side. The angular intervals blocked by nearby obstacles are computed once and the smallest free deviation
+        (a multiple of angular_step) is picked directly; if none exists None is returned. The navigation will only
+        consist of up to one command; call this method again in the next turn to continue navigating to the position.
 
         :param Entity target: The entity to which you will navigate
         :param game_map.Map game_map: The map of the game, from which obstacles will be extracted
@@ -287,26 +324,138 @@ class Ship(Entity):
         :param int angular_step: The degree difference to deviate if the original destination has obstacles
         :param bool ignore_ships: Whether to ignore ships in calculations (this will make your movement faster, but more precarious)
         :param bool ignore_planets: Whether to ignore planets in calculations (useful if you want to crash onto planets)
+        :param reservation.ReservationTable reservations: Movements already ordered for own ships this turn. If given,
+            reserved ships are avoided where they will be during the turn instead of where they are now, and the
+            resulting movement (or standing still) is reserved for this ship.
         :return string: The command trying to be passed to the Halite engine or None if movement is not possible within max_corrections degrees.
         :rtype: str
         """
         # Assumes a position, not planet (as it would go to the center of the planet otherwise)
         if max_corrections <= 0:
-            return None
+            return self._reserve_stationary(reservations)
         distance = self.calculate_distance_between(target)
         angle = self.calculate_angle_between(target)
         ignore = () if not (ignore_ships or ignore_planets) \
             else Ship if (ignore_ships and not ignore_planets) \
             else Planet if (ignore_planets and not ignore_ships) \
             else Entity
-        if avoid_obstacles and game_map.obstacles_between(self, target, ignore):
-            new_target_dx = math.cos(math.radians(angle + angular_step)) * distance
-            new_target_dy = math.sin(math.radians(angle + angular_step)) * distance
-            new_target = Position(self.x + new_target_dx, self.y + new_target_dy)
-            return self.navigate(new_target, game_map, speed, True, max_corrections - 1, angular_step)
         speed = speed if (distance >= speed) else distance
+        if avoid_obstacles and distance > 0:
+            obstacles = [obstacle for obstacle in game_map.nearby_obstacles(self, distance, ignore)
+                         if obstacle is not target
+                         and not (reservations is not None and isinstance(obstacle, Ship) and obstacle in reservations)]
+            deviation = self._free_deviation(obstacles, distance, angle, max_corrections, angular_step,
+                                             None if ignore_ships else reservations, speed)
+            if instrumentation.enabled:
+                instrumentation.count("navigate.failed" if deviation is None else "navigate.corrections",
+                                      1 if deviation is None else int(abs(deviation) // angular_step))
+            if deviation is None:
+                return self._reserve_stationary(reservations)
+            angle = (angle + deviation) % 360
+        if reservations is not None:
+            reservations.reserve(self, int(speed), round(angle))
         return self.thrust(speed, angle)
 
+    def _reserve_stationary(self, reservations):
+        """
+        Reserve the ship's current position for this turn, if reservations are used.
+
+        :return: None (no command)
+        """
+        if reservations is not None:
+            reservations.reserve_stationary(self)
+        return None
+
+    def _blocked_intervals(self, obstacles, distance, angle):
+        """
+        Compute the headings in which a straight movement of the given length would hit an obstacle.
+
+        :param list[Entity] obstacles: The obstacles to consider
+        :param float distance: The length of the movement
+        :param float angle: The heading towards the target in degrees
+        :return: List of (centre, half width) intervals in degrees, centre relative to angle
+        :rtype: list[(float, float)]
+        """
+        intervals = []
+        for obstacle in obstacles:
+            obstacle_distance = self.calculate_distance_between(obstacle)
+            radius = obstacle.radius + self.radius + constants.NAVIGATION_FUDGE
+            if obstacle_distance <= radius:
+                # Already touching: every heading that does not point away from the obstacle is blocked
+                half_width = 90.0
+            elif distance ** 2 >= obstacle_distance ** 2 - radius ** 2:
+                # The movement reaches past the tangent points
+                half_width = math.degrees(math.asin(radius / obstacle_distance))
+            else:
+                # Only headings whose end point lies inside the obstacle are blocked
+                cos_half_width = (distance ** 2 + obstacle_distance ** 2 - radius ** 2) / (2 * distance * obstacle_distance)
+                if cos_half_width > 1:
+                    continue
+                half_width = math.degrees(math.acos(cos_half_width))
+            centre = (self.calculate_angle_between(obstacle) - angle + 180) % 360 - 180
+            intervals.append((centre, half_width))
+        return intervals
+
+    def _free_deviation(self, obstacles, distance, angle, max_corrections, angular_step, reservations=None, speed=0):
+        """
+        Find the smallest deviation (a multiple of angular_step, clockwise or counter-clockwise) whose movement does
+        not hit any obstacle. Candidate headings are taken from the edges of the blocked intervals, then the whole fan
+        of candidates is checked against all obstacles in one batched collision test. With reservations, this turn's
+        movement must also keep clear of the reserved movements; if none of the interval candidates does, every
+        allowed step is tried.
+
+        :param list[Entity] obstacles: The obstacles to consider
+        :param float distance: The length of the movement
+        :param float angle: The heading towards the target in degrees
+        :param int max_corrections: The number of angular steps that may be tried per side
+        :param int angular_step: The degree difference between two tried headings
+        :param reservation.ReservationTable reservations: Movements of own ships to keep clear of (optional)
+        :param float speed: The distance actually travelled this turn (used for the reservations)
+        :return: The deviation in degrees or None if every allowed heading is blocked
+        :rtype: float
+        """
+        if not obstacles and (reservations is None or len(reservations) == 0):
+            return 0
+
+        # Candidates are the target heading and the first steps just outside every interval edge
+        candidates = {0}
+        for centre, half_width in self._blocked_intervals(obstacles, distance, angle):
+            candidates.add(math.floor((centre + half_width) / angular_step + 1) * angular_step)
+            candidates.add(math.ceil((centre - half_width) / angular_step - 1) * angular_step)
+
+        max_deviation = (max_corrections - 1) * angular_step
+        candidates = sorted((deviation for deviation in candidates if abs(deviation) <= max_deviation),
+                            key=lambda d: (abs(d), d < 0))
+
+        deviation = self._first_free(candidates, obstacles, distance, angle, reservations, speed)
+        if deviation is None and reservations is not None and len(reservations):
+            steps = np.arange(1, max_corrections)
+            fan = [0] + [step * angular_step * sign for step in steps for sign in (1, -1)]
+            deviation = self._first_free(fan, obstacles, distance, angle, reservations, speed)
+        return deviation
+
+    def _first_free(self, candidates, obstacles, distance, angle, reservations, speed):
+        """
+        :return: The first candidate deviation whose movement is free, or None
+        :rtype: float
+        """
+        headings = np.radians(angle + np.array(candidates, dtype=float))
+        cos, sin = np.cos(headings), np.sin(headings)
+        hits, _ = collision.intersect_segments_circles(
+            self.x, self.y, self.x + distance * cos, self.y + distance * sin,
+            [obstacle.x for obstacle in obstacles], [obstacle.y for obstacle in obstacles],
+            [obstacle.radius for obstacle in obstacles], fudge=self.radius + constants.NAVIGATION_FUDGE)
+        blocked = hits.any(axis=1)
+        if instrumentation.enabled:
+            instrumentation.count("navigate.collision_tests", hits.size)
+        if reservations is not None:
+            # the engine moves int(speed) along the rounded angle
+            turn_headings = np.radians(np.round(angle + np.array(candidates, dtype=float)))
+            blocked |= reservations.conflicts(self.x, self.y, self.x + int(speed) * np.cos(turn_headings),
+                                              self.y + int(speed) * np.sin(turn_headings))
+        free = np.flatnonzero(~blocked)
+        return candidates[free[0]] if len(free) else None
+
     def can_dock(self, planet):
         """
         Determine whether a ship can dock to a planet
@@ -330,20 +479,31 @@ class Ship(Entity):
         self.planet = planets.get(self.planet)  # If not will just reset to none
 
     @staticmethod
-    def _parse_single(player_id, tokens):
+    def _parse_single(player_id, tokens, previous=None):
         """
         Parse a single ship given tokenized input from the game environment.
 
         :param int player_id: The id of the player who controls the ships
-        :param list[tokens]: The remaining tokens
-        :return: The ship ID, ship object, and unused tokens.
-        :rtype: int, Ship, list[str]
+        :param iterator[str] tokens: Cursor over the tokenized input; the ship's tokens are consumed from it
+        :param dict[int, Ship] previous: Ships of the last turn; if the ship is among them, it is updated in place
+        :return: The ship ID and ship object.
+        :rtype: int, Ship
         """
         (sid, x, y, hp, vel_x, vel_y,
-         docked, docked_planet, progress, cooldown, *remainder) = tokens
+         docked, docked_planet, progress, cooldown) = islice(tokens, 10)
 
         sid = int(sid)
-        docked = Ship.DockingStatus(int(docked))
+        docked = _DOCKING_STATUSES[int(docked)]
+
+        ship = previous.get(sid) if previous else None
+        if ship is not None:
+            ship._update(player_id,
+                         float(x), float(y),
+                         int(hp),
+                         float(vel_x), float(vel_y),
+                         docked, int(docked_planet),
+                         int(progress), int(cooldown))
+            return sid, ship
 
         ship = Ship(player_id,
                     sid,
@@ -353,23 +513,23 @@ class Ship(Entity):
                     docked, int(docked_planet),
                     int(progress), int(cooldown))
 
-        return sid, ship, remainder
+        return sid, ship
 
     @staticmethod
-    def _parse(player_id, tokens):
+    def _parse(player_id, tokens, previous=None):
         """
         Parse ship data given a tokenized input.
 
         :param int player_id: The id of the player who owns the ships
-        :param list[str] tokens: The tokenized input
-        :return: The dict of Players and unused tokens.
-        :rtype: (dict, list[str])
+        :param iterator[str] tokens: Cursor over the tokenized input; the ship tokens are consumed from it
+        :param dict[int, Ship] previous: The player's ships of the last turn to update in place (optional)
+        :return: The dict of ships.
+        :rtype: dict
         """
         ships = {}
-        num_ships, *remainder = tokens
-        for _ in range(int(num_ships)):
-            ship_id, ships[ship_id], remainder = Ship._parse_single(player_id, remainder)
-        return ships, remainder
+        for _ in range(int(next(tokens))):
+            ship_id, ships[ship_id] = Ship._parse_single(player_id, tokens, previous)
+        return ships
 
 
 class Position(Entity):
@@ -383,6 +543,7 @@ class Position(Entity):
     :ivar health: Unused.
     :ivar owner: Unused.
     """
+    __slots__ = ()
 
     def __init__(self, x, y):
         self.x = x
@@ -394,3 +555,8 @@ class Position(Entity):
 
     def _link(self, players, planets):
         raise NotImplementedError("Position should not have link attributes.")
+
+
+#: The valid docking status values, indexed by their encoding (an invalid value raises IndexError); a tuple lookup
+#: is cheaper than calling Ship.DockingStatus for every ship of every frame
+_DOCKING_STATUSES = tuple(Ship.DockingStatus)
@@ -1,4 +1,4 @@
-from . import collision, entity
+from . import collision, columns, constants, entity, instrumentation, spatial
 
 
 class Map:
@@ -8,19 +8,30 @@ class Map:
     :ivar my_id: Current player id associated with the map
     :ivar width: Map width
     :ivar height: Map height
+    :ivar incremental: Whether each turn updates the existing entity objects in place
+    :ivar last_diff: The changes between the last two parsed turns
+    :ivar ship_columns: Columnar (NumPy) view of all ships, for batched geometry
+    :ivar planet_columns: Columnar (NumPy) view of all planets, for batched geometry
     """
 
-    def __init__(self, my_id, width, height):
+    def __init__(self, my_id, width, height, incremental=False):
         """
         :param my_id: User's id (tag)
         :param width: Map width
         :param height: Map height
+        :param bool incremental: If True, players, ships and planets that survive a turn keep their identity and are
+            updated in place instead of being recreated
         """
         self.my_id = my_id
         self.width = width
         self.height = height
+        self.incremental = incremental
+        self.last_diff = MapDiff()
         self._players = {}
         self._planets = {}
+        self._index = spatial.SpatialIndex([])
+        self.ship_columns = columns.EntityColumns([])
+        self.planet_columns = columns.EntityColumns([])
 
     def get_me(self):
         """
@@ -59,19 +70,40 @@ class Map:
         """
         return list(self._planets.values())
 
-    def nearby_entities_by_distance(self, entity):
+    @instrumentation.timed("Map.nearby_entities_by_distance")
+    def nearby_entities_by_distance(self, entity, max_distance=None):
         """
         :param entity: The source entity to find distances from
+        :param float max_distance: If given, only entities whose centre lies within this distance are returned
         :return: Dict containing all entities with their designated distances
         :rtype: dict
         """
+        if max_distance is None:
+            candidates = self._index.entities()
+        else:
+            candidates = self._index.within(entity.x, entity.y, max_distance)
         result = {}
-        for foreign_entity in self._all_ships() + self.all_planets():
+        for foreign_entity in candidates:
             if entity == foreign_entity:
                 continue
-            result.setdefault(entity.calculate_distance_between(foreign_entity), []).append(foreign_entity)
+            distance = entity.calculate_distance_between(foreign_entity)
+            if max_distance is not None and distance > max_distance:
+                continue
+            result.setdefault(distance, []).append(foreign_entity)
         return result
 
+    def nearest_entities(self, entity, count, predicate=None):
+        """
+        :param entity: The source entity to find the nearest entities to
+        :param int count: The number of entities to return
+        :param predicate: Optional filter; only entities for which it returns True are considered
+        :return: Up to count (distance, entity) pairs, nearest first
+        :rtype: list[(float, entity.Entity)]
+        """
+        return self._index.nearest(entity.x, entity.y, count + 1,
+                                   lambda foreign_entity: foreign_entity is not entity
+                                   and (predicate is None or predicate(foreign_entity)))[:count]
+
     def _link(self):
         """
         Updates all the entities with the correct ship and planet objects
@@ -81,6 +113,7 @@ class Map:
         for celestial_object in self.all_planets() + self._all_ships():
             celestial_object._link(self._players, self._planets)
 
+    @instrumentation.timed("Map._parse")
     def _parse(self, map_string):
         """
         Parse the map description from the game.
@@ -88,13 +121,26 @@ class Map:
         :param map_string: The string which the Halite engine outputs
         :return: nothing
         """
-        tokens = map_string.split()
+        previous_ships = {ship.id: (ship, ship.docking_status) for ship in self._all_ships()}
+        previous_planets = {planet.id: (planet, _owner_id(planet)) for planet in self.all_planets()}
 
-        self._players, tokens = Player._parse(tokens)
-        self._planets, tokens = entity.Planet._parse(tokens)
+        # A single cursor walks the tokens once; the parse functions consume from it without copying
+        tokens = iter(map_string.split())
 
-        assert(len(tokens) == 0)  # There should be no remaining tokens at this point
+        if self.incremental:
+            self._players = Player._parse(tokens, self._players)
+            self._planets = entity.Planet._parse(tokens, self._planets)
+        else:
+            self._players = Player._parse(tokens)
+            self._planets = entity.Planet._parse(tokens)
+
+        assert(next(tokens, None) is None)  # There should be no remaining tokens at this point
         self._link()
+        ships, planets = self._all_ships(), self.all_planets()
+        self.last_diff = MapDiff._between(previous_ships, previous_planets, ships, planets)
+        self._index = spatial.SpatialIndex(ships + planets)
+        self.ship_columns = columns.EntityColumns(ships)
+        self.planet_columns = columns.EntityColumns(planets)
 
     def _all_ships(self):
         """
@@ -116,11 +162,11 @@ class Map:
         :return: The colliding entity if so, else None.
         :rtype: entity.Entity
         """
-        for celestial_object in self._all_ships() + self.all_planets():
+        for celestial_object in self._index.within(target.x, target.y, target.radius + constants.NAVIGATION_FUDGE):
             if celestial_object is target:
                 continue
             d = celestial_object.calculate_distance_between(target)
-            if d <= celestial_object.radius + target.radius + 0.1:
+            if d <= celestial_object.radius + target.radius + constants.NAVIGATION_FUDGE:
                 return celestial_object
         return None
 
@@ -134,21 +180,41 @@ class Map:
         :return: The list of obstacles between the ship and target
         :rtype: list[entity.Entity]
         """
-        obstacles = []
-        entities = ([] if issubclass(entity.Planet, ignore) else self.all_planets()) \
-            + ([] if issubclass(entity.Ship, ignore) else self._all_ships())
-        for foreign_entity in entities:
-            if foreign_entity == ship or foreign_entity == target:
-                continue
-            if collision.intersect_segment_circle(ship, target, foreign_entity, fudge=ship.radius + 0.1):
-                obstacles.append(foreign_entity)
-        return obstacles
+        fudge = ship.radius + constants.NAVIGATION_FUDGE
+        candidates = [foreign_entity for foreign_entity
+                      in self._index.along_segment(ship.x, ship.y, target.x, target.y, fudge)
+                      if not (foreign_entity == ship or foreign_entity == target or isinstance(foreign_entity, ignore))]
+        if not candidates:
+            return []
+        hits, _ = collision.intersect_segments_circles(ship.x, ship.y, target.x, target.y,
+                                                       [foreign_entity.x for foreign_entity in candidates],
+                                                       [foreign_entity.y for foreign_entity in candidates],
+                                                       [foreign_entity.radius for foreign_entity in candidates],
+                                                       fudge=fudge)
+        return [foreign_entity for foreign_entity, hit in zip(candidates, hits[0]) if hit]
+
+    @instrumentation.timed("Map.nearby_obstacles")
+    def nearby_obstacles(self, ship, max_distance, ignore=()):
+        """
+        Collect the entities a ship could hit when flying up to max_distance in any direction.
+
+        :param entity.Ship ship: Source entity
+        :param float max_distance: The length of the planned movement
+        :param entity.Entity ignore: Which entity type to ignore
+        :return: The list of entities within reach of the ship
+        :rtype: list[entity.Entity]
+        """
+        reach = max_distance + ship.radius + constants.NAVIGATION_FUDGE
+        return [foreign_entity for foreign_entity in self._index.within(ship.x, ship.y, reach)
+                if foreign_entity is not ship and not isinstance(foreign_entity, ignore)]
 
 
 class Player:
     """
     :ivar id: The player's unique id
     """
+    __slots__ = ("id", "_ships")
+
     def __init__(self, player_id, ships={}):
         """
         :param player_id: User's id
@@ -173,40 +239,118 @@ class Player:
         return self._ships.get(ship_id)
 
     @staticmethod
-    def _parse_single(tokens):
+    def _parse_single(tokens, previous=None):
         """
         Parse one user given an input string from the Halite engine.
 
-        :param list[str] tokens: The input string as a list of str from the Halite engine.
-        :return: The parsed player id, player object, and remaining tokens
-        :rtype: (int, Player, list[str])
+        :param iterator[str] tokens: Cursor over the tokenized input from the Halite engine.
+        :param dict[int, Player] previous: Players of the last turn; if the player is among them, it and its ships
+            are updated in place
+        :return: The parsed player id and player object
+        :rtype: (int, Player)
         """
-        player_id, *remainder = tokens
-        player_id = int(player_id)
-        ships, remainder = entity.Ship._parse(player_id, remainder)
+        player_id = int(next(tokens))
+        player = previous.get(player_id) if previous else None
+        if player is not None:
+            player._ships = entity.Ship._parse(player_id, tokens, player._ships)
+            return player_id, player
+
+        ships = entity.Ship._parse(player_id, tokens)
         player = Player(player_id, ships)
-        return player_id, player, remainder
+        return player_id, player
 
     @staticmethod
-    def _parse(tokens):
+    def _parse(tokens, previous=None):
         """
         Parse an entire user input string from the Halite engine for all users.
 
-        :param list[str] tokens: The input string as a list of str from the Halite engine.
-        :return: The parsed players in the form of player dict, and remaining tokens
-        :rtype: (dict, list[str])
+        :param iterator[str] tokens: Cursor over the tokenized input from the Halite engine.
+        :param dict[int, Player] previous: Players of the last turn to update in place (optional)
+        :return: The parsed players in the form of player dict
+        :rtype: dict
         """
-        num_players, *remainder = tokens
-        num_players = int(num_players)
+        num_players = int(next(tokens))
         players = {}
 
         for _ in range(num_players):
-            player, players[player], remainder = Player._parse_single(remainder)
+            player, players[player] = Player._parse_single(tokens, previous)
 
-        return players, remainder
+        return players
 
     def __str__(self):
         return "Player {} with ships {}".format(self.id, self.all_ships())
 
     def __repr__(self):
         return self.__str__()
+
+
+class MapDiff:
+    """
+    Changes between two consecutive turns.
+
+    :ivar spawned_ships: Ships that did not exist in the previous turn
+    :ivar destroyed_ships: Ships of the previous turn that no longer exist (the last known objects)
+    :ivar destroyed_planets: Planets of the previous turn that no longer exist (the last known objects)
+    :ivar ownership_changes: (planet, previous owner id, new owner id) for every planet whose owner changed;
+        an owner id of None means unowned
+    :ivar docking_changes: (ship, previous docking status, new docking status) for every ship whose status changed
+    """
+
+    def __init__(self, spawned_ships=(), destroyed_ships=(), destroyed_planets=(), ownership_changes=(),
+                 docking_changes=()):
+        self.spawned_ships = list(spawned_ships)
+        self.destroyed_ships = list(destroyed_ships)
+        self.destroyed_planets = list(destroyed_planets)
+        self.ownership_changes = list(ownership_changes)
+        self.docking_changes = list(docking_changes)
+
+    @staticmethod
+    def _between(previous_ships, previous_planets, ships, planets):
+        """
+        Compare the state of the previous turn with the freshly parsed entities.
+
+        :param dict[int, (entity.Ship, int)] previous_ships: Ships and docking status by id
+        :param dict[int, (entity.Planet, int)] previous_planets: Planets and owner id by id
+        :param list[entity.Ship] ships: The ships of the new turn
+        :param list[entity.Planet] planets: The planets of the new turn
+        :return: The changes between both turns
+        :rtype: MapDiff
+        """
+        diff = MapDiff()
+        current_ship_ids = set()
+        for ship in ships:
+            current_ship_ids.add(ship.id)
+            previous = previous_ships.get(ship.id)
+            if previous is None:
+                diff.spawned_ships.append(ship)
+            elif previous[1] != ship.docking_status:
+                diff.docking_changes.append((ship, previous[1], ship.docking_status))
+        diff.destroyed_ships = [previous[0] for ship_id, previous in previous_ships.items()
+                                if ship_id not in current_ship_ids]
+
+        current_planet_ids = set()
+        for planet in planets:
+            current_planet_ids.add(planet.id)
+            previous = previous_planets.get(planet.id)
+            if previous is not None and previous[1] != _owner_id(planet):
+                diff.ownership_changes.append((planet, previous[1], _owner_id(planet)))
+        diff.destroyed_planets = [previous[0] for planet_id, previous in previous_planets.items()
+                                  if planet_id not in current_planet_ids]
+        return diff
+
+    def __str__(self):
+        return "MapDiff: {} spawned, {} destroyed ships, {} destroyed planets, {} ownership and {} docking changes"\
+            .format(len(self.spawned_ships), len(self.destroyed_ships), len(self.destroyed_planets),
+                    len(self.ownership_changes), len(self.docking_changes))
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def _owner_id(planet):
+    """
+    :param entity.Planet planet: A linked planet
+    :return: The id of the planet's owner or None if it is not owned
+    :rtype: int
+    """
+    return planet.owner.id if planet.owner is not None else None
@@ -0,0 +1,191 @@
+"""
+Per-turn timers and counters for the hot paths of a bot. Collection is off by default; every hook checks the module
+flag :data:`enabled` first, so a disabled hook costs a flag check (and one extra call for :func:`timed`). When
+enabled, the stats of every turn are appended as one JSON line to a sidecar file, which :func:`aggregate` (or
+``benchmarks/instrumentation_report.py``) summarizes across turns and games.
+"""
+import functools
+import json
+import os
+import time
+
+import numpy as np
+
+#: Whether stats are collected. Check this before collecting anything on a hot path.
+enabled = False
+
+_sidecar = None
+_turn = 0
+_timers = {}
+_counters = {}
+
+
+def enable(path):
+    """
+    Start collecting stats and append them to the given sidecar file, one JSON line per turn.
+
+    :param str path: The sidecar file
+    :return: nothing
+    """
+    global enabled, _sidecar, _turn
+    disable()
+    _sidecar = open(path, "a", buffering=1)
+    _turn = 0
+    _timers.clear()
+    _counters.clear()
+    enabled = True
+
+
+def disable():
+    """
+    Stop collecting stats and close the sidecar file.
+
+    :return: nothing
+    """
+    global enabled, _sidecar
+    enabled = False
+    if _sidecar is not None:
+        _sidecar.close()
+        _sidecar = None
+
+
+def add_time(name, seconds):
+    """
+    Add one call of the given phase or call site to this turn's timers.
+
+    :param str name: The phase or call site
+    :param float seconds: Time spent in the call
+    :return: nothing
+    """
+    calls_and_seconds = _timers.get(name)
+    if calls_and_seconds is None:
+        _timers[name] = [1, seconds]
+    else:
+        calls_and_seconds[0] += 1
+        calls_and_seconds[1] += seconds
+
+
+def count(name, amount=1):
+    """
+    Add to one of this turn's counters (e.g. expanded nodes or collision tests).
+
+    :param str name: The counter
+    :param int amount: The amount to add
+    :return: nothing
+    """
+    _counters[name] = _counters.get(name, 0) + amount
+
+
+class timer:
+    """
+    Context manager timing a phase, e.g. ``with instrumentation.timer("assignment"): ...``. Measures nothing when
+    instrumentation is disabled.
+    """
+
+    __slots__ = ("name", "_started")
+
+    def __init__(self, name):
+        self.name = name
+        self._started = None
+
+    def __enter__(self):
+        if enabled:
+            self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._started is not None and enabled:
+            add_time(self.name, time.perf_counter() - self._started)
+        self._started = None
+
+
+def timed(name):
+    """
+    Decorator timing every call of a function under the given name.
+
+    :param str name: The call site
+    :return: The decorator
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                add_time(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def end_turn(**extra):
+    """
+    Write this turn's stats to the sidecar file and reset them.
+
+    :param extra: Additional values to store with the turn (e.g. the total turn time)
+    :return: The written record, or None if instrumentation is disabled
+    :rtype: dict
+    """
+    global _turn
+    if not enabled:
+        return None
+    record = {
+        "pid": os.getpid(),
+        "turn": _turn,
+        "timers_ms": {name: round(seconds * 1e3, 4) for name, (_, seconds) in _timers.items()},
+        "calls": {name: calls for name, (calls, _) in _timers.items()},
+        "counters": dict(_counters),
+    }
+    record.update(extra)
+    _sidecar.write(json.dumps(record) + "\n")
+    _turn += 1
+    _timers.clear()
+    _counters.clear()
+    return record
+
+
+def aggregate(paths):
+    """
+    Summarize sidecar files over all turns they contain.
+
+    :param list[str] paths: The sidecar files (e.g. one per game)
+    :return: For every timer the per-turn mean, percentiles and maximum in ms, and for every counter its per-turn
+        mean and maximum. Turns in which a timer or counter did not appear count as 0.
+    :rtype: dict
+    """
+    records = []
+    for path in paths:
+        with open(path) as file:
+            records.extend(json.loads(line) for line in file if line.strip())
+
+    def stats(values):
+        values = np.array(values, dtype=float)
+        return {"mean": float(values.mean()), "p50": float(np.percentile(values, 50)),
+                "p99": float(np.percentile(values, 99)), "max": float(values.max())}
+
+    timer_names = sorted({name for record in records for name in record["timers_ms"]})
+    counter_names = sorted({name for record in records for name in record["counters"]})
+    return {
+        "turns": len(records),
+        "timers_ms": {name: stats([record["timers_ms"].get(name, 0) for record in records]) for name in timer_names},
+        "counters": {name: stats([record["counters"].get(name, 0) for record in records]) for name in counter_names},
+    }
+
+
+def report(paths):
+    """
+    Print the summary of the given sidecar files.
+
+    :param list[str] paths: The sidecar files
+    :return: nothing
+    """
+    summary = aggregate(paths)
+    print("{} turns".format(summary["turns"]))
+    print("{:<40} {:>10} {:>10} {:>10} {:>10}".format("timer (ms per turn)", "mean", "p50", "p99", "max"))
+    for name, values in summary["timers_ms"].items():
+        print("{:<40} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f}".format(name, *values.values()))
+    print("{:<40} {:>10} {:>10} {:>10} {:>10}".format("counter (per turn)", "mean", "p50", "p99", "max"))
+    for name, values in summary["counters"].items():
+        print("{:<40} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.1f}".format(name, *values.values()))
@@ -0,0 +1,62 @@
+from collections import namedtuple
+from types import MappingProxyType
+
+
+class PlanetLayout(namedtuple("PlanetLayout", "id x y radius num_docking_spots")):
+    """
+    The static part of a planet: where it is, how big it is and how many ships can dock to it.
+
+    :ivar id: The planet ID.
+    :ivar x: The planet x-coordinate.
+    :ivar y: The planet y-coordinate.
+    :ivar radius: The planet radius.
+    :ivar num_docking_spots: The max number of ships that can be docked.
+    """
+    __slots__ = ()
+
+
+class InitialLayout(namedtuple("InitialLayout", "width height planets start_positions")):
+    """
+    Immutable snapshot of the static layout of a game, taken from the initial map. It offers the map methods the
+    pathfinding precomputation needs (width, height, :func:`all_planets`, :func:`get_planet`), without holding on to
+    any ship, player or per-turn planet state.
+
+    :ivar width: Map width
+    :ivar height: Map height
+    :ivar planets: The planets, as a tuple of PlanetLayout
+    :ivar start_positions: The (x, y) positions of every player's initial ships, keyed by player id (read-only)
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_map(cls, game_map):
+        """
+        Take the snapshot in a single pass over the map.
+
+        :param game_map.Map game_map: The initial map
+        :return: The layout of the map
+        :rtype: InitialLayout
+        """
+        planets = tuple(PlanetLayout(planet.id, planet.x, planet.y, planet.radius, planet.num_docking_spots)
+                        for planet in game_map.all_planets())
+        start_positions = {player.id: tuple((ship.x, ship.y) for ship in player.all_ships())
+                           for player in game_map.all_players()}
+        return cls(game_map.width, game_map.height, planets, MappingProxyType(start_positions))
+
+    def all_planets(self):
+        """
+        :return: List of all planets
+        :rtype: list[PlanetLayout]
+        """
+        return list(self.planets)
+
+    def get_planet(self, planet_id):
+        """
+        :param int planet_id:
+        :return: The planet associated with planet_id, or None
+        :rtype: PlanetLayout
+        """
+        for planet in self.planets:
+            if planet.id == planet_id:
+                return planet
+        return None
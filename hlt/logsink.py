@@ -0,0 +1,106 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+
+#: Format of the lines written to the log file (same as logging.basicConfig's default)
+LOG_FORMAT = logging.BASIC_FORMAT
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue handler that leaves the formatting to the listener thread. The standard QueueHandler formats every record
+    in the calling thread; here the record is queued as is, so its arguments are formatted later (arguments that are
+    mutated in the meantime are logged in their later state).
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class _CallSiteCap(logging.Filter):
+    """
+    Drops records of call sites (file and line) that already logged max_per_call_site records in the current turn.
+    """
+
+    def __init__(self, max_per_call_site):
+        super().__init__()
+        self.max_per_call_site = max_per_call_site
+        self.counts = {}
+
+    def filter(self, record):
+        key = (record.pathname, record.lineno)
+        count = self.counts.get(key, 0) + 1
+        self.counts[key] = count
+        return count <= self.max_per_call_site
+
+    def suppressed(self):
+        """
+        :return: The call sites over the cap and the number of dropped records of each
+        :rtype: dict[(str, int), int]
+        """
+        return {key: count - self.max_per_call_site for key, count in self.counts.items()
+                if count > self.max_per_call_site}
+
+
+class BufferedLogSink:
+    """
+    Non-blocking logging for the bot process. Records below the level are rejected by the logging module before a
+    message is built; the remaining records are put on a queue and formatted and written to the log file by a
+    background thread, so neither string formatting nor disk I/O happens on the turn's critical path. Optionally,
+    chatty call sites are capped to a number of records per turn.
+
+    :ivar log_file: The file written to
+    """
+
+    def __init__(self, log_file, level=logging.DEBUG, max_per_call_site=None):
+        """
+        :param str log_file: The file to write the log to (truncated)
+        :param int level: The minimum level of records to keep
+        :param int max_per_call_site: Maximum number of records per call site and turn (optional)
+        """
+        self.log_file = log_file
+        self._queue = queue.SimpleQueue()
+        self._handler = _DeferredQueueHandler(self._queue)
+        self._cap = _CallSiteCap(max_per_call_site) if max_per_call_site else None
+        if self._cap is not None:
+            self._handler.addFilter(self._cap)
+
+        file_handler = logging.FileHandler(log_file, mode='w')
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        self._listener = logging.handlers.QueueListener(self._queue, file_handler)
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self._handler)
+        root.setLevel(level)
+        self._listener.start()
+        atexit.register(self.close)
+
+    def end_turn(self):
+        """
+        Reset the per-turn call site counts and log how many records were dropped in the finished turn.
+
+        :return: nothing
+        """
+        if self._cap is None:
+            return
+        suppressed = self._cap.suppressed()
+        self._cap.counts.clear()
+        for (path, line), dropped in suppressed.items():
+            logging.info("Suppressed %d log records from %s:%d", dropped, path, line)
+
+    def close(self):
+        """
+        Write all queued records and stop the background thread.
+
+        :return: nothing
+        """
+        if self._listener is None:
+            return
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+        logging.getLogger().removeHandler(self._handler)
+        self._listener = None
@@ -1,14 +1,19 @@
 import sys
 import logging
-import copy
+import time
 
-from . import game_map
+from . import commands, game_map, layout, logsink, recording, visibility
 
 
 class Game:
     """
     :ivar map: Current map representation
-    :ivar initial_map: The initial version of the map before game starts
+    :ivar initial_layout: Static layout of the map before the game starts (see :class:`layout.InitialLayout`)
+    :ivar initial_map: The initial version of the map (see :func:`initial_map`)
+    :ivar visibility_graph: Visibility graph over the planet layout, built once from the initial layout
+    :ivar turn_started_at: time.perf_counter() value at which the current turn's frame was received
+    :ivar recorder: Recorder of the engine input, if the game is recorded (see :class:`recording.FrameRecorder`)
+    :ivar log_sink: The buffered logging sink, if buffered logging is used (see :class:`logsink.BufferedLogSink`)
     """
     @staticmethod
     def _send_string(s):
@@ -30,59 +35,104 @@ class Game:
         sys.stdout.write('\n')
         sys.stdout.flush()
 
-    @staticmethod
-    def _get_string():
+    def _get_string(self):
         """
-        Read input from the game.
+        Read input from the game and record it, if the game is recorded.
 
         :return: The input read from the Halite engine
         :rtype: str
+        :raises EOFError: If the engine closed the input (end of the game or of a replay)
         """
-        result = sys.stdin.readline().rstrip('\n')
+        line = sys.stdin.readline()
+        if not line:
+            raise EOFError("No more input from the Halite engine")
+        result = line.rstrip('\n')
+        if self.recorder is not None:
+            self.recorder.write(result)
         return result
 
     @staticmethod
     def send_command_queue(command_queue):
         """
-        Issue the given list of commands.
+        Issue the given commands with a single write.
 
-        :param list[str] command_queue: List of commands to send the Halite engine
+        :param command_queue: The commands to send the Halite engine, as a list of command strings or as a
+            :class:`commands.CommandBuffer` (which holds at most one command per ship)
+        :type command_queue: list[str] | commands.CommandBuffer
         :return: nothing
         """
-        for command in command_queue:
-            Game._send_string(command)
-
-        Game._done_sending()
+        if isinstance(command_queue, commands.CommandBuffer):
+            line = command_queue.encode()
+        else:
+            line = "".join(command_queue)
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
 
     @staticmethod
-    def _set_up_logging(tag, name):
+    def _set_up_logging(tag, name, level=logging.DEBUG, buffered=False, max_per_call_site=None):
         """
         Set up and truncate the log
 
         :param tag: The user tag (used for naming the log)
         :param name: The bot name (used for naming the log)
-        :return: nothing
+        :param int level: The minimum level of logged records
+        :param bool buffered: Whether to write the log from a background thread (see :class:`logsink.BufferedLogSink`)
+        :param int max_per_call_site: Maximum number of records per call site and turn (buffered logging only)
+        :return: The buffered logging sink, or None if logging is synchronous
+        :rtype: logsink.BufferedLogSink
         """
         log_file = "{}_{}.log".format(tag, name)
-        logging.basicConfig(filename=log_file, level=logging.DEBUG, filemode='w')
-        logging.info("Initialized bot {}".format(name))
-
-    def __init__(self, name):
+        sink = None
+        if buffered:
+            sink = logsink.BufferedLogSink(log_file, level, max_per_call_site)
+        else:
+            logging.basicConfig(filename=log_file, level=level, filemode='w')
+        logging.info("Initialized bot %s", name)
+        return sink
+
+    def __init__(self, name, incremental_updates=False, record_frames=None, log_level=logging.DEBUG,
+                 buffered_logging=False, max_logs_per_call_site=None):
         """
         Initialize the bot with the given name.
 
         :param name: The name of the bot.
+        :param bool incremental_updates: Whether to update the map's entity objects in place every turn (see Map)
+        :param str record_frames: File to record all engine input to, for replaying the game offline (optional)
+        :param int log_level: The minimum level of logged records
+        :param bool buffered_logging: Whether to format and write the log from a background thread
+        :param int max_logs_per_call_site: With buffered logging, the maximum number of records per call site and
+            turn (optional)
         """
         self._name = name
         self._send_name = False
+        self.recorder = recording.FrameRecorder(record_frames) if record_frames else None
         tag = int(self._get_string())
-        Game._set_up_logging(tag, name)
+        self.log_sink = Game._set_up_logging(tag, name, log_level, buffered_logging, max_logs_per_call_site)
         width, height = [int(x) for x in self._get_string().strip().split()]
-        self.map = game_map.Map(tag, width, height)
+        self.map = game_map.Map(tag, width, height, incremental=incremental_updates)
+        self.visibility_graph = None
+        self.turn_started_at = time.perf_counter()
+        self._initial_frame = None
+        self._initial_map = None
         self.update_map()
-        self.initial_map = copy.deepcopy(self.map)
+        self.initial_layout = layout.InitialLayout.from_map(self.map)
+        self.visibility_graph = visibility.VisibilityGraph(self.initial_layout)
         self._send_name = True
 
+    @property
+    def initial_map(self):
+        """
+        The initial version of the map, as a separate :class:`game_map.Map` that is not updated during the game. It is
+        parsed from the first frame when it is accessed first; the static layout alone is :attr:`initial_layout`.
+
+        :return: The initial map
+        :rtype: game_map.Map
+        """
+        if self._initial_map is None:
+            self._initial_map = game_map.Map(self.map.my_id, self.map.width, self.map.height)
+            self._initial_map._parse(self._initial_frame)
+        return self._initial_map
+
     def update_map(self):
         """
         Parse the map given by the engine.
@@ -94,6 +144,15 @@ class Game:
             self._send_string(self._name)
             self._done_sending()
             self._send_name = False
+        if self.log_sink is not None:
+            self.log_sink.end_turn()
         logging.info("---NEW TURN---")
-        self.map._parse(self._get_string())
+        frame = self._get_string()
+        self.turn_started_at = time.perf_counter()
+        if self._initial_frame is None:
+            self._initial_frame = frame
+        self.map._parse(frame)
+        if self.visibility_graph is not None:
+            for planet in self.map.last_diff.destroyed_planets:
+                self.visibility_graph.remove_planet(planet.id)
         return self.map
@@ -0,0 +1,125 @@
+import math
+from collections import OrderedDict
+
+from . import instrumentation
+
+#: Default maximum number of cached paths
+DEFAULT_CAPACITY = 256
+#: Default edge length of the cells start and goal points are quantized to
+DEFAULT_CELL_SIZE = 2.0
+#: Waypoints and goals within this distance of a destroyed planet's surface belong to routes around or to it
+INVALIDATION_MARGIN = 5.0
+
+
+class PathCache:
+    """
+    LRU cache in front of a pathfinder. Queries are keyed by the quantized start and goal cells, so ships leaving the
+    same place for the same target share one search. If the pathfinder has a line_of_sight(start, end) method, the
+    first leg of a cached path is checked from the actual start before it is reused, as the path may have been
+    planned from another point of the start cell.
+
+    :ivar capacity: Maximum number of cached paths
+    :ivar cell_size: Edge length of the quantization cells
+    :ivar hits: Number of queries answered from the cache
+    :ivar misses: Number of queries passed on to the pathfinder
+    :ivar rejected: Number of cached paths whose first leg was blocked from the actual start (counted as misses)
+    :ivar evictions: Number of paths dropped because the cache was full
+    :ivar invalidations: Number of paths dropped because a planet disappeared
+    """
+
+    def __init__(self, pathfinder, capacity=DEFAULT_CAPACITY, cell_size=DEFAULT_CELL_SIZE):
+        """
+        :param pathfinder: Object with a find_path(start, goal) and optionally a line_of_sight(start, end) method,
+            e.g. visibility.VisibilityGraph
+        :param int capacity: Maximum number of cached paths
+        :param float cell_size: Edge length of the quantization cells
+        """
+        self._pathfinder = pathfinder
+        self._line_of_sight = getattr(pathfinder, "line_of_sight", None)
+        self.capacity = capacity
+        self.cell_size = cell_size
+        self._paths = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._paths)
+
+    def _key(self, start, goal):
+        """
+        :return: The quantized (start cell, goal cell) key of a query
+        :rtype: tuple
+        """
+        size = self.cell_size
+        return (math.floor(start.x / size), math.floor(start.y / size),
+                math.floor(goal.x / size), math.floor(goal.y / size))
+
+    def find_path(self, start, goal):
+        """
+        Return a path from start to goal, computing it only if no path between the same cells is cached.
+
+        :param entity.Entity start: Start point
+        :param entity.Entity goal: Goal point
+        :return: A fresh list of waypoints (the caller may consume it)
+        :rtype: list[(float, float)]
+        """
+        key = self._key(start, goal)
+        path = self._paths.get(key)
+        if path and self._line_of_sight is not None and not self._line_of_sight(start, path[0]):
+            # planned from another point of the start cell; the first leg would clip a planet from this one
+            self.rejected += 1
+            if instrumentation.enabled:
+                instrumentation.count("path_cache.rejected")
+            path = None
+        if path is not None:
+            self._paths.move_to_end(key)
+            self.hits += 1
+            if instrumentation.enabled:
+                instrumentation.count("path_cache.hits")
+            return list(path)
+
+        self.misses += 1
+        if instrumentation.enabled:
+            instrumentation.count("path_cache.misses")
+        path = tuple(self._pathfinder.find_path(start, goal))
+        self._paths[key] = path
+        self._paths.move_to_end(key)
+        if len(self._paths) > self.capacity:
+            self._paths.popitem(last=False)
+            self.evictions += 1
+        return list(path)
+
+    def invalidate_planet(self, planet):
+        """
+        Drop the paths affected by a destroyed planet: paths routed around it or leading to it, and all unreachable
+        results, which may have become reachable.
+
+        :param entity.Planet planet: The destroyed planet
+        :return: The number of dropped paths
+        :rtype: int
+        """
+        reach_sq = (planet.radius + INVALIDATION_MARGIN) ** 2
+        stale = [key for key, path in self._paths.items()
+                 if not path or any((x - planet.x) ** 2 + (y - planet.y) ** 2 <= reach_sq for x, y in path)]
+        for key in stale:
+            del self._paths[key]
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        """
+        Drop all cached paths.
+
+        :return: nothing
+        """
+        self._paths.clear()
+
+    def __str__(self):
+        return "PathCache with {} paths: {} hits, {} misses ({} rejected), {} evictions, {} invalidations"\
+            .format(len(self._paths), self.hits, self.misses, self.rejected, self.evictions, self.invalidations)
+
+    def __repr__(self):
+        return self.__str__()
@@ -0,0 +1,57 @@
+import gzip
+
+#: File name extension of recorded games
+RECORDING_EXTENSION = ".frames.gz"
+
+
+class FrameRecorder:
+    """
+    Writes every raw line read from the engine (tag, map size, initial frame and one frame per turn) to a gzip
+    compressed text file, one engine line per file line. The file is flushed after every line, so a recording stays
+    readable up to the last turn even if the bot is killed by the engine.
+    """
+
+    def __init__(self, path):
+        """
+        :param str path: File to write the recording to (truncated if it exists)
+        """
+        self.path = path
+        self._file = gzip.open(path, "wt", encoding="ascii")
+
+    def write(self, line):
+        """
+        Record one engine line.
+
+        :param str line: The line as read from the engine, without the trailing newline
+        :return: nothing
+        """
+        self._file.write(line)
+        self._file.write("\n")
+        self._file.flush()
+
+    def close(self):
+        """
+        Finish the recording.
+
+        :return: nothing
+        """
+        self._file.close()
+
+
+def read_frames(path):
+    """
+    Read a recording written by :class:`FrameRecorder`.
+
+    :param str path: The recorded file
+    :return: The recorded engine lines, without trailing newlines
+    :rtype: list[str]
+    """
+    lines = []
+    with gzip.open(path, "rt", encoding="ascii") as file:
+        try:
+            for line in file:
+                lines.append(line.rstrip("\n"))
+        except EOFError:
+            # the bot was killed before the recording was closed; every flushed line is complete
+            pass
+    return lines
@@ -0,0 +1,103 @@
+import numpy as np
+
+from . import constants
+
+
+class ReservationTable:
+    """
+    Space-time reservations of the movements already ordered for own ships in the current turn. Every movement is
+    stored as a swept segment (start and displacement over the turn); a new movement conflicts with a reservation if
+    both ships come closer than two ship radii (plus fudge) at the same moment of the turn.
+
+    :ivar fudge: Extra distance kept between two moving ships
+    """
+
+    def __init__(self, fudge=constants.NAVIGATION_FUDGE):
+        """
+        :param float fudge: Extra distance kept between two moving ships
+        """
+        self.fudge = fudge
+        self.clear()
+
+    def clear(self):
+        """
+        Drop all reservations, e.g. at the start of a new turn.
+
+        :return: nothing
+        """
+        self._ship_ids = set()
+        self._start_x = []
+        self._start_y = []
+        self._velocity_x = []
+        self._velocity_y = []
+        self._arrays = None
+
+    def __len__(self):
+        return len(self._ship_ids)
+
+    def __contains__(self, ship):
+        """
+        :param entity.Ship ship: The ship to look up
+        :return: True if a movement is reserved for the ship
+        :rtype: bool
+        """
+        return ship.id in self._ship_ids
+
+    def reserve(self, ship, magnitude, angle):
+        """
+        Record the movement a thrust command will make this turn.
+
+        :param entity.Ship ship: The ship that moves
+        :param float magnitude: The thrust magnitude (distance travelled this turn)
+        :param float angle: The thrust angle in degrees
+        :return: nothing
+        """
+        self._ship_ids.add(ship.id)
+        self._start_x.append(ship.x)
+        self._start_y.append(ship.y)
+        self._velocity_x.append(magnitude * np.cos(np.radians(angle)))
+        self._velocity_y.append(magnitude * np.sin(np.radians(angle)))
+        self._arrays = None
+
+    def reserve_stationary(self, ship):
+        """
+        Record that the ship stays where it is this turn.
+
+        :param entity.Ship ship: The ship that does not move
+        :return: nothing
+        """
+        self.reserve(ship, 0, 0)
+
+    def conflicts(self, start_x, start_y, end_x, end_y):
+        """
+        Test candidate movements of one turn against all reservations in one vectorized call.
+
+        :param start_x: x-coordinates of the candidate starts, scalar or shape (S,)
+        :param start_y: y-coordinates of the candidate starts, scalar or shape (S,)
+        :param end_x: x-coordinates of the candidate end points after this turn, scalar or shape (S,)
+        :param end_y: y-coordinates of the candidate end points after this turn, scalar or shape (S,)
+        :return: Boolean array of shape (S,), True where the candidate comes too close to a reserved movement
+        :rtype: numpy.ndarray
+        """
+        start_x, start_y, end_x, end_y = np.broadcast_arrays(*(np.atleast_1d(np.asarray(value, dtype=float))
+                                                               for value in (start_x, start_y, end_x, end_y)))
+        if not self._ship_ids:
+            return np.zeros(start_x.shape, dtype=bool)
+        if self._arrays is None:
+            self._arrays = tuple(np.array(values) for values in
+                                 (self._start_x, self._start_y, self._velocity_x, self._velocity_y))
+        reserved_x, reserved_y, reserved_vx, reserved_vy = self._arrays
+        limit = 2 * constants.SHIP_RADIUS + self.fudge
+
+        # Relative position d(t) = d0 + t * dv of candidate to reservation, t in [0, 1]
+        d0_x = start_x[:, np.newaxis] - reserved_x
+        d0_y = start_y[:, np.newaxis] - reserved_y
+        dv_x = (end_x - start_x)[:, np.newaxis] - reserved_vx
+        dv_y = (end_y - start_y)[:, np.newaxis] - reserved_vy
+
+        dv_sq = dv_x * dv_x + dv_y * dv_y
+        safe_dv_sq = np.where(dv_sq == 0, 1.0, dv_sq)
+        t = np.clip(np.where(dv_sq == 0, 0.0, -(d0_x * dv_x + d0_y * dv_y) / safe_dv_sq), 0.0, 1.0)
+        closest_x = d0_x + t * dv_x
+        closest_y = d0_y + t * dv_y
+        return (closest_x * closest_x + closest_y * closest_y <= limit * limit).any(axis=1)
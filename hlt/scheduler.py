@@ -0,0 +1,75 @@
+import time
+
+#: Time the engine allows a bot per turn, in seconds
+DEFAULT_TURN_TIME = 2.0
+#: Time kept in reserve per turn for sending the commands, in seconds
+DEFAULT_SAFETY_MARGIN = 0.4
+
+
+class TurnScheduler:
+    """
+    Keeps track of the time left in the current turn, so that expensive planning can stop before the engine's
+    deadline while the remaining ships still get a cheap command.
+
+    :ivar turn_time: Time the engine allows per turn, in seconds
+    :ivar safety_margin: Time kept in reserve before the deadline, in seconds
+    """
+
+    def __init__(self, turn_time=DEFAULT_TURN_TIME, safety_margin=DEFAULT_SAFETY_MARGIN, clock=time.perf_counter):
+        """
+        :param float turn_time: Time the engine allows per turn, in seconds
+        :param float safety_margin: Time kept in reserve before the deadline, in seconds
+        :param clock: Monotonic clock returning seconds (time.perf_counter by default)
+        """
+        self.turn_time = turn_time
+        self.safety_margin = safety_margin
+        self._clock = clock
+        self._started_at = clock()
+
+    def start(self, started_at=None):
+        """
+        Start the clock of a new turn.
+
+        :param float started_at: Clock value at which the turn started, e.g. Game.turn_started_at (default: now)
+        :return: nothing
+        """
+        self._started_at = self._clock() if started_at is None else started_at
+
+    def elapsed(self):
+        """
+        :return: Seconds since the turn started
+        :rtype: float
+        """
+        return self._clock() - self._started_at
+
+    def remaining(self):
+        """
+        :return: Seconds left until the safety margin before the deadline is reached (negative if exceeded)
+        :rtype: float
+        """
+        return self.turn_time - self.safety_margin - self.elapsed()
+
+    def expired(self):
+        """
+        :return: True if no time for further planning is left in this turn
+        :rtype: bool
+        """
+        return self.remaining() <= 0
+
+    def schedule(self, items, priority=None):
+        """
+        Iterate over the items in order of priority. Every item is yielded together with a flag telling whether there
+        is still time to plan it; once the time is used up, all remaining items are yielded with False so the caller
+        can issue a cheap fallback command for them.
+
+        :param list items: The items (usually ships) to plan this turn
+        :param priority: Optional key function; items with a lower key are planned first
+        :return: (item, in_time) pairs
+        :rtype: generator
+        """
+        ordered = sorted(items, key=priority) if priority is not None else list(items)
+        in_time = True
+        for item in ordered:
+            if in_time and self.expired():
+                in_time = False
+            yield item, in_time
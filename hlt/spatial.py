@@ -0,0 +1,171 @@
+import math
+
+#: Default edge length of a grid cell
+DEFAULT_CELL_SIZE = 8.0
+
+
+class SpatialIndex:
+    """
+    Uniform grid over the entities of one turn. Every entity is stored in all cells its circle overlaps, so queries
+    only have to look at the cells around the query area.
+
+    :ivar cell_size: Edge length of a grid cell
+    :ivar max_radius: The largest radius of all indexed entities
+    """
+
+    def __init__(self, entities, cell_size=DEFAULT_CELL_SIZE):
+        """
+        :param list[entity.Entity] entities: The entities to index
+        :param float cell_size: Edge length of a grid cell
+        """
+        self.cell_size = cell_size
+        self._entities = list(entities)
+        self._cells = {}
+        self.max_radius = 0
+        for entity in self._entities:
+            self.max_radius = max(self.max_radius, entity.radius)
+            for cell in self._cells_in_box(entity.x - entity.radius, entity.y - entity.radius,
+                                           entity.x + entity.radius, entity.y + entity.radius):
+                self._cells.setdefault(cell, []).append(entity)
+        self._bounds = (min(cell_x for cell_x, _ in self._cells), min(cell_y for _, cell_y in self._cells),
+                        max(cell_x for cell_x, _ in self._cells), max(cell_y for _, cell_y in self._cells)) \
+            if self._cells else None
+
+    def _cells_in_box(self, min_x, min_y, max_x, max_y):
+        """
+        :return: The keys of all cells overlapping the given box
+        :rtype: generator[(int, int)]
+        """
+        size = self.cell_size
+        for cell_x in range(int(math.floor(min_x / size)), int(math.floor(max_x / size)) + 1):
+            for cell_y in range(int(math.floor(min_y / size)), int(math.floor(max_y / size)) + 1):
+                yield cell_x, cell_y
+
+    def _candidates(self, min_x, min_y, max_x, max_y):
+        """
+        :return: Every indexed entity stored in a cell overlapping the given box, each one only once
+        :rtype: list[entity.Entity]
+        """
+        if self._bounds is None:
+            return []
+        # only the occupied part of the grid can hold entities, however large the box is
+        size = self.cell_size
+        min_cell_x, min_cell_y, max_cell_x, max_cell_y = self._bounds
+        min_x = max(min_x, min_cell_x * size)
+        min_y = max(min_y, min_cell_y * size)
+        max_x = min(max_x, (max_cell_x + 1) * size - 1e-9)
+        max_y = min(max_y, (max_cell_y + 1) * size - 1e-9)
+
+        seen = set()
+        candidates = []
+        for cell in self._cells_in_box(min_x, min_y, max_x, max_y):
+            for entity in self._cells.get(cell, ()):
+                if id(entity) not in seen:
+                    seen.add(id(entity))
+                    candidates.append(entity)
+        return candidates
+
+    def entities(self):
+        """
+        :return: All indexed entities
+        :rtype: list[entity.Entity]
+        """
+        return list(self._entities)
+
+    def within(self, x, y, radius):
+        """
+        Radius query.
+
+        :param float x: Query x-coordinate
+        :param float y: Query y-coordinate
+        :param float radius: Query radius
+        :return: All entities whose circle overlaps the circle of the given radius around (x, y)
+        :rtype: list[entity.Entity]
+        """
+        return [entity for entity in self._candidates(x - radius, y - radius, x + radius, y + radius)
+                if (entity.x - x) ** 2 + (entity.y - y) ** 2 <= (radius + entity.radius) ** 2]
+
+    def nearest(self, x, y, count, predicate=None):
+        """
+        k-nearest query by centre distance. The grid is searched ring by ring around the query cell until no unseen
+        entity can be closer than the current k-th result.
+
+        :param float x: Query x-coordinate
+        :param float y: Query y-coordinate
+        :param int count: Number of entities to return
+        :param predicate: Optional filter; only entities for which it returns True are considered
+        :return: Up to count (distance, entity) pairs sorted by distance
+        :rtype: list[(float, entity.Entity)]
+        """
+        if count <= 0 or self._bounds is None:
+            return []
+
+        size = self.cell_size
+        centre_x, centre_y = int(math.floor(x / size)), int(math.floor(y / size))
+        min_x, min_y, max_x, max_y = self._bounds
+        max_ring = max(centre_x - min_x, max_x - centre_x, centre_y - min_y, max_y - centre_y, 0)
+
+        seen = set()
+        found = []
+        for ring in range(max_ring + 1):
+            for cell in _ring_cells(centre_x, centre_y, ring):
+                for entity in self._cells.get(cell, ()):
+                    if id(entity) in seen:
+                        continue
+                    seen.add(id(entity))
+                    if predicate is None or predicate(entity):
+                        found.append((math.sqrt((entity.x - x) ** 2 + (entity.y - y) ** 2), entity))
+
+            # every entity not seen yet has its centre outside the searched rings
+            if len(found) >= count:
+                found.sort(key=lambda pair: pair[0])
+                if found[count - 1][0] <= ring * size:
+                    return found[:count]
+
+        found.sort(key=lambda pair: pair[0])
+        return found[:count]
+
+    def along_segment(self, start_x, start_y, end_x, end_y, width):
+        """
+        Segment corridor query.
+
+        :param float start_x: Segment start x-coordinate
+        :param float start_y: Segment start y-coordinate
+        :param float end_x: Segment end x-coordinate
+        :param float end_y: Segment end y-coordinate
+        :param float width: Half width of the corridor around the segment
+        :return: All entities whose circle reaches into the corridor
+        :rtype: list[entity.Entity]
+        """
+        reach = width + self.max_radius
+        candidates = self._candidates(min(start_x, end_x) - reach, min(start_y, end_y) - reach,
+                                      max(start_x, end_x) + reach, max(start_y, end_y) + reach)
+
+        dx = end_x - start_x
+        dy = end_y - start_y
+        length_sq = dx * dx + dy * dy
+        result = []
+        for entity in candidates:
+            t = 0.0 if length_sq == 0 else ((entity.x - start_x) * dx + (entity.y - start_y) * dy) / length_sq
+            t = min(max(t, 0.0), 1.0)
+            closest_x = start_x + t * dx - entity.x
+            closest_y = start_y + t * dy - entity.y
+            if closest_x * closest_x + closest_y * closest_y <= (width + entity.radius) ** 2:
+                result.append(entity)
+        return result
+
+
+def _ring_cells(centre_x, centre_y, ring):
+    """
+    :return: The keys of the cells at exactly the given Chebyshev distance from the centre cell
+    :rtype: generator[(int, int)]
+    """
+    if ring == 0:
+        yield centre_x, centre_y
+        return
+    for cell_x in range(centre_x - ring, centre_x + ring + 1):
+        yield cell_x, centre_y - ring
+        yield cell_x, centre_y + ring
+    for cell_y in range(centre_y - ring + 1, centre_y + ring):
+        yield centre_x - ring, cell_y
+        yield centre_x + ring, cell_y
@@ -0,0 +1,140 @@
+import math
+
+import numpy as np
+
+from . import constants, entity, instrumentation
+
+#: Edge length of a cell of the threat grid
+DEFAULT_CELL_SIZE = 2.0
+#: Distance at which an enemy ship can damage a ship next turn: it moves at full speed and then fires
+DEFAULT_REACH = constants.MAX_SPEED + constants.WEAPON_RADIUS + 2 * constants.SHIP_RADIUS
+
+
+class ThreatField:
+    """
+    Coarse raster of the damage the enemy ships can deal next turn. Every undocked enemy ship (docked ships do not
+    fire) is counted into the cell it is in, and the counts are spread with a disc-shaped kernel of the given reach
+    and weight. The disc is applied row by row as a box filter over prefix sums, so an update costs a few NumPy passes
+    over the grid, independent of the number of ships.
+
+    A cell's value is the damage all ships in reach would deal if all of them fired at a single ship there. It is an
+    upper bound, as the engine splits a ship's damage among all targets in range.
+
+    :ivar cell_size: Edge length of a cell
+    :ivar reach: Radius of the kernel
+    :ivar damage: Weight of the kernel (damage of one ship)
+    :ivar grid: The threat per cell, indexed [row (y), column (x)]
+    """
+
+    def __init__(self, width, height, cell_size=DEFAULT_CELL_SIZE, reach=DEFAULT_REACH,
+                 damage=constants.WEAPON_DAMAGE):
+        """
+        :param int width: Map width
+        :param int height: Map height
+        :param float cell_size: Edge length of a cell
+        :param float reach: Radius of the kernel
+        :param float damage: Weight of the kernel
+        """
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        self.reach = reach
+        self.damage = damage
+        self._columns = int(math.ceil(width / cell_size))
+        self._rows = int(math.ceil(height / cell_size))
+        self.grid = np.zeros((self._rows, self._columns))
+
+        # half width of the disc (in cells) for every row offset 0..k, measured between cell centres
+        k = int(reach // cell_size)
+        self._half_widths = [int(math.sqrt(max(reach ** 2 - (dy * cell_size) ** 2, 0)) // cell_size)
+                             for dy in range(k + 1)]
+
+    def update(self, game_map):
+        """
+        Rasterize the undocked enemy ships of the map.
+
+        :param game_map.Map game_map: The map of the current turn
+        :return: The field
+        :rtype: ThreatField
+        """
+        ships = game_map.ship_columns
+        enemies = (ships.owner != game_map.my_id) & (ships.docking_status == entity.Ship.DockingStatus.UNDOCKED)
+        return self.update_from_positions(ships.x[enemies], ships.y[enemies])
+
+    @instrumentation.timed("ThreatField.update")
+    def update_from_positions(self, x, y):
+        """
+        Rasterize ships at the given positions.
+
+        :param numpy.ndarray x: x-coordinates of the threatening ships
+        :param numpy.ndarray y: y-coordinates of the threatening ships
+        :return: The field
+        :rtype: ThreatField
+        """
+        rows, columns = self._rows, self._columns
+        column = np.clip((np.asarray(x) / self.cell_size).astype(int), 0, columns - 1)
+        row = np.clip((np.asarray(y) / self.cell_size).astype(int), 0, rows - 1)
+        counts = np.bincount(row * columns + column, minlength=rows * columns).reshape(rows, columns)
+
+        k = len(self._half_widths) - 1
+        # prefix sums along x over the counts padded by k cells on both sides (plus a leading zero column)
+        prefix = np.zeros((rows, columns + 2 * k + 1))
+        np.cumsum(counts, axis=1, out=prefix[:, k + 1:k + 1 + columns])
+        prefix[:, k + 1 + columns:] = prefix[:, k + columns:k + 1 + columns]
+
+        # every row offset dy adds the horizontal box sum of half width h(dy) of row y + dy
+        grid = np.zeros((rows, columns))
+        for dy, half_width in enumerate(self._half_widths):
+            right, left = k + half_width + 1, k - half_width
+            box = prefix[:, right:right + columns] - prefix[:, left:left + columns]
+            if dy == 0:
+                grid += box
+            elif dy < rows:
+                grid[:-dy] += box[dy:]
+                grid[dy:] += box[:-dy]
+
+        grid *= self.damage
+        self.grid = grid
+        return self
+
+    def at(self, x, y):
+        """
+        :param float x: x-coordinate
+        :param float y: y-coordinate
+        :return: The threat at the point (0 outside the map)
+        :rtype: float
+        """
+        column = int(x // self.cell_size)
+        row = int(y // self.cell_size)
+        if 0 <= row < self._rows and 0 <= column < self._columns:
+            return self.grid[row, column]
+        return 0.0
+
+    def values_at(self, x, y):
+        """
+        Batched :func:`at`.
+
+        :param numpy.ndarray x: x-coordinates
+        :param numpy.ndarray y: y-coordinates
+        :return: The threat at every point
+        :rtype: numpy.ndarray
+        """
+        column = np.floor_divide(np.asarray(x, dtype=float), self.cell_size).astype(int)
+        row = np.floor_divide(np.asarray(y, dtype=float), self.cell_size).astype(int)
+        inside = (row >= 0) & (row < self._rows) & (column >= 0) & (column < self._columns)
+        values = np.zeros(inside.shape)
+        values[inside] = self.grid[row[inside], column[inside]]
+        return values
+
+    def cost_layer(self, scale=1.0):
+        """
+        The field resampled to one value per map unit, as extra cost layer for a grid search (e.g. the A* search of
+        the bot).
+
+        :param float scale: Cost per unit of threat
+        :return: (height, width) array of costs, indexed [y, x]
+        :rtype: numpy.ndarray
+        """
+        rows = np.minimum(((np.arange(self.height) + 0.5) / self.cell_size).astype(int), self._rows - 1)
+        columns = np.minimum(((np.arange(self.width) + 0.5) / self.cell_size).astype(int), self._columns - 1)
+        return self.grid[rows[:, np.newaxis], columns] * scale
@@ -0,0 +1,264 @@
+import heapq
+import math
+
+import numpy as np
+
+from . import collision, constants, instrumentation
+
+#: Default extra distance kept between the graph nodes and the (ship-inflated) planet surface
+DEFAULT_MARGIN = 1.0
+#: Default number of graph nodes placed around every planet
+DEFAULT_POINTS_PER_PLANET = 8
+
+
+class VisibilityGraph:
+    """
+    Visibility graph over the static planet layout. Nodes are placed on a polygon around every planet (inflated by
+    the ship radius and a safety margin), edges connect every pair of nodes with a free straight line between them.
+    The graph is built once; destroyed planets can be removed without rebuilding it.
+
+    :ivar width: Map width
+    :ivar height: Map height
+    :ivar last_expanded_nodes: Number of graph nodes expanded by the last :func:`find_path` query
+    """
+
+    def __init__(self, game_map, margin=DEFAULT_MARGIN, points_per_planet=DEFAULT_POINTS_PER_PLANET):
+        """
+        :param layout.InitialLayout game_map: The layout (or map) to take the planets from
+        :param float margin: Extra distance between the graph nodes and the ship-inflated planet surface
+        :param int points_per_planet: Number of nodes placed around every planet
+        """
+        self.width = game_map.width
+        self.height = game_map.height
+        self.last_expanded_nodes = 0
+
+        planets = game_map.all_planets()
+        self._planet_index = {planet.id: index for index, planet in enumerate(planets)}
+        self._planet_x = np.array([planet.x for planet in planets], dtype=float)
+        self._planet_y = np.array([planet.y for planet in planets], dtype=float)
+        self._planet_r = np.array([planet.radius for planet in planets], dtype=float) + constants.SHIP_CLEARANCE
+        self._planet_active = np.ones(len(planets), dtype=bool)
+
+        self._create_nodes(planets, margin, points_per_planet)
+        self._create_edges()
+
+    def _create_nodes(self, planets, margin, points_per_planet):
+        """
+        Place the graph nodes on a regular polygon around every planet. The polygon is circumscribed, so its edges
+        keep at least the margin to the inflated planet.
+
+        :return: nothing
+        """
+        angles = np.arange(points_per_planet) * (2 * math.pi / points_per_planet)
+        stretch = 1 / math.cos(math.pi / points_per_planet)
+
+        xs, ys, owners = [], [], []
+        for index, planet in enumerate(planets):
+            node_radius = (planet.radius + constants.SHIP_RADIUS + margin) * stretch
+            xs.append(planet.x + node_radius * np.cos(angles))
+            ys.append(planet.y + node_radius * np.sin(angles))
+            owners.append(np.full(points_per_planet, index))
+
+        node_x = np.concatenate(xs) if xs else np.empty(0)
+        node_y = np.concatenate(ys) if ys else np.empty(0)
+        node_planet = np.concatenate(owners) if owners else np.empty(0, dtype=int)
+
+        # Nodes outside the map or inside another planet can never be used
+        inside_map = (node_x >= 0) & (node_x < self.width) & (node_y >= 0) & (node_y < self.height)
+        dist_sq = (node_x[:, np.newaxis] - self._planet_x) ** 2 + (node_y[:, np.newaxis] - self._planet_y) ** 2
+        free = ~(dist_sq <= self._planet_r ** 2).any(axis=1)
+        keep = inside_map & free
+
+        self._node_x = node_x[keep]
+        self._node_y = node_y[keep]
+        self._node_planet = node_planet[keep]
+        self._node_active = np.ones(len(self._node_x), dtype=bool)
+
+    def _create_edges(self):
+        """
+        Test all node pairs against all planets. For every planet the pairs it blocks are stored, so removing the
+        planet later only needs to decrement the blocker count of those pairs.
+
+        :return: nothing
+        """
+        num_nodes = len(self._node_x)
+        num_planets = len(self._planet_x)
+        self._blocker_count = np.zeros((num_nodes, num_nodes), dtype=np.int16)
+        blocked_rows = [[] for _ in range(num_planets)]
+        blocked_cols = [[] for _ in range(num_planets)]
+
+        for i in range(num_nodes):
+            # only the upper triangle is needed, the graph is undirected
+            cols = np.arange(i + 1, num_nodes)
+            if len(cols) == 0:
+                continue
+            blocked, _ = collision.intersect_segments_circles(self._node_x[i], self._node_y[i],
+                                                              self._node_x[cols], self._node_y[cols],
+                                                              self._planet_x, self._planet_y, self._planet_r, fudge=0)
+            self._blocker_count[i, cols] = blocked.sum(axis=1)
+            pair_index, planet_index = np.nonzero(blocked)
+            for planet in np.unique(planet_index):
+                blocked_cols[planet].append(cols[pair_index[planet_index == planet]])
+                blocked_rows[planet].append(np.full(np.count_nonzero(planet_index == planet), i))
+
+        self._blocker_count += self._blocker_count.T
+        self._blocked_pairs = [
+            (np.concatenate(rows), np.concatenate(cols)) if rows else (np.empty(0, dtype=int), np.empty(0, dtype=int))
+            for rows, cols in zip(blocked_rows, blocked_cols)
+        ]
+
+        dx = self._node_x[:, np.newaxis] - self._node_x
+        dy = self._node_y[:, np.newaxis] - self._node_y
+        self._edge_length = np.hypot(dx, dy)
+        self._update_neighbours()
+
+    def _update_neighbours(self):
+        """
+        Rebuild the adjacency lists from the blocker counts of the active nodes.
+
+        :return: nothing
+        """
+        visible = (self._blocker_count == 0) & self._node_active[:, np.newaxis] & self._node_active
+        np.fill_diagonal(visible, False)
+        self._neighbours = [
+            list(zip(indices.tolist(), self._edge_length[i, indices].tolist()))
+            for i, indices in enumerate(np.nonzero(row)[0] for row in visible)
+        ]
+
+    def planet_ids(self):
+        """
+        :return: The ids of all planets still present in the graph
+        :rtype: set[int]
+        """
+        return {planet_id for planet_id, index in self._planet_index.items() if self._planet_active[index]}
+
+    def remove_planet(self, planet_id):
+        """
+        Remove a destroyed planet. Its nodes are dropped and every edge it was blocking becomes available.
+
+        :param int planet_id: The id of the destroyed planet
+        :return: nothing
+        """
+        index = self._planet_index.get(planet_id)
+        if index is None or not self._planet_active[index]:
+            return
+
+        self._planet_active[index] = False
+        self._node_active[self._node_planet == index] = False
+        rows, cols = self._blocked_pairs[index]
+        self._blocker_count[rows, cols] -= 1
+        self._blocker_count[cols, rows] -= 1
+        self._update_neighbours()
+
+    def _visible_nodes(self, x, y):
+        """
+        :return: Indices of the active nodes with a free straight line from (x, y), and their distances
+        :rtype: (numpy.ndarray, numpy.ndarray)
+        """
+        nodes = np.nonzero(self._node_active)[0]
+        active = self._planet_active
+        blocked, _ = collision.intersect_segments_circles(x, y, self._node_x[nodes], self._node_y[nodes],
+                                                          self._planet_x[active], self._planet_y[active],
+                                                          self._planet_r[active], fudge=0)
+        nodes = nodes[~blocked.any(axis=1)]
+        return nodes, np.hypot(self._node_x[nodes] - x, self._node_y[nodes] - y)
+
+    def line_of_sight(self, start, end):
+        """
+        :param start: Start of the segment (entity or (x, y) tuple)
+        :param end: End of the segment (entity or (x, y) tuple)
+        :return: True if the straight line between both points clears all remaining planets
+        :rtype: bool
+        """
+        start_x, start_y = _coordinates(start)
+        end_x, end_y = _coordinates(end)
+        active = self._planet_active
+        blocked, _ = collision.intersect_segments_circles(start_x, start_y, end_x, end_y,
+                                                          self._planet_x[active], self._planet_y[active],
+                                                          self._planet_r[active], fudge=0)
+        return not blocked.any()
+
+    @instrumentation.timed("VisibilityGraph.find_path")
+    def find_path(self, start, goal):
+        """
+        Find the shortest route between two points with A* over the graph. The start and goal are connected to all
+        nodes they can see for this query only.
+
+        :param start: Start point (entity or (x, y) tuple)
+        :param goal: Goal point (entity or (x, y) tuple)
+        :return: The waypoints after the start, ending with the goal, or an empty list if the goal is unreachable
+        :rtype: list[(float, float)]
+        """
+        start_x, start_y = _coordinates(start)
+        goal_x, goal_y = _coordinates(goal)
+        self.last_expanded_nodes = 0
+
+        if self.line_of_sight((start_x, start_y), (goal_x, goal_y)):
+            return [(goal_x, goal_y)]
+
+        start_nodes, start_distances = self._visible_nodes(start_x, start_y)
+        goal_nodes, goal_distances = self._visible_nodes(goal_x, goal_y)
+        if len(start_nodes) == 0 or len(goal_nodes) == 0:
+            return []
+
+        goal_edges = dict(zip(goal_nodes.tolist(), goal_distances.tolist()))
+        heuristic = np.hypot(self._node_x - goal_x, self._node_y - goal_y).tolist()
+
+        # Node -1 stands for the goal itself
+        goal_node = -1
+        cost_so_far = {}
+        came_from = {}
+        frontier = []
+        for node, distance in zip(start_nodes.tolist(), start_distances.tolist()):
+            cost_so_far[node] = distance
+            came_from[node] = None
+            heapq.heappush(frontier, (distance + heuristic[node], distance, node))
+
+        closed = set()
+        while frontier:
+            _, current_costs, current_node = heapq.heappop(frontier)
+            if current_node in closed:
+                continue
+            closed.add(current_node)
+            self.last_expanded_nodes += 1
+
+            if current_node == goal_node:
+                break
+
+            neighbours = self._neighbours[current_node]
+            if current_node in goal_edges:
+                neighbours = neighbours + [(goal_node, goal_edges[current_node])]
+
+            for next_node, edge_length in neighbours:
+                if next_node in closed:
+                    continue
+                path_costs = current_costs + edge_length
+                if path_costs < cost_so_far.get(next_node, math.inf):
+                    cost_so_far[next_node] = path_costs
+                    came_from[next_node] = current_node
+                    h = 0 if next_node == goal_node else heuristic[next_node]
+                    heapq.heappush(frontier, (path_costs + h, path_costs, next_node))
+
+        if instrumentation.enabled:
+            instrumentation.count("visibility.expanded_nodes", self.last_expanded_nodes)
+        if goal_node not in came_from:
+            return []
+
+        path = [(goal_x, goal_y)]
+        node = came_from[goal_node]
+        while node is not None:
+            path.append((float(self._node_x[node]), float(self._node_y[node])))
+            node = came_from[node]
+        path.reverse()
+        return path
+
+
+def _coordinates(point):
+    """
+    :param point: An entity (anything with x, y attributes) or an (x, y) tuple
+    :return: The coordinates of the point
+    :rtype: (float, float)
+    """
+    if isinstance(point, tuple):
+        return point
+    return point.x, point.y
@@ -1,3 +1,8 @@
 #!/bin/sh
 
-./halite -d "240 160" "python3 Jarvis.py" "python3 Jarvis.py"
\ No newline at end of file
+if [ -x ./halite ]; then
+    ./halite -d "240 160" "python3 Jarvis.py" "python3 Jarvis.py"
+else
+    # ohne Engine (z.B. unter Linux) den Simulator benutzen
+    python3 simulator.py -d "240 160" "python3 Jarvis.py" "python3 Jarvis.py"
+fi
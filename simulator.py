@@ -0,0 +1,586 @@
+"""
+Headless Halite-II-Simulator für Selbstspiele unter Linux (ohne halite.exe). Die Bots laufen als eigene Prozesse und
+sprechen dasselbe stdin/stdout-Protokoll wie mit der Engine (siehe hlt.networking.Game). Bewegung, Kollisionen,
+Kampf, Andocken und Produktion folgen den Regeln der Engine mit den Werten aus hlt/constants.py; ein Spielzug wird
+mit NumPy für alle Schiffe gleichzeitig berechnet.
+
+Vereinfachungen gegenüber der Engine: Angriffe werden erst am Ende der Bewegung ausgewertet, die Karte ist eine
+zufällige symmetrische Karte und ungültige Befehle werden ignoriert statt den Bot zu beenden. Wie in der Engine wird
+nach der Bewegung die Reibung (DRAG) abgezogen; da sie größer als MAX_SPEED ist, melden die Frames immer die
+Geschwindigkeit 0.
+
+Aufruf: python simulator.py -d "240 160" [-s SEED] [--max-turns N] [--no-timeout] "python3 Jarvis.py" "python3 Jarvis.py"
+"""
+import argparse
+import json
+import math
+import queue
+import random
+import re
+import shlex
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from hlt import constants
+
+# Schiffe, mit denen jeder Spieler startet
+SHIPS_PER_PLAYER = 3
+# Produktion, die ein neues Schiff kostet
+SHIP_COST = 72
+# Lebenspunkte eines Planeten pro Einheit Radius
+PLANET_HEALTH_PER_RADIUS = 255
+# Produktion, die ein Planet insgesamt hergeben kann, pro Einheit Radius
+PLANET_PRODUCTION_PER_RADIUS = 1000
+# Reibung der Engine: wird nach der Bewegung vom Betrag der Geschwindigkeit abgezogen (mindestens bis 0)
+DRAG = 10
+# Bedenkzeit (Sekunden) für die Initialisierung und für jede Runde
+INITIAL_TIMEOUT = 60.0
+TURN_TIMEOUT = 2.0
+
+# Andockstatus wie in hlt.entity.Ship.DockingStatus
+UNDOCKED, DOCKING, DOCKED, UNDOCKING = range(4)
+NO_OWNER = -1
+
+# Befehle kommen ohne Trennzeichen an, z.B. "t 1 7 90d 2 0u 3"
+COMMAND_PATTERN = re.compile(r"([tdu])((?: -?[\d.]+)+)")
+
+
+def default_max_turns(width, height):
+    # wie in der Engine: längere Spiele auf größeren Karten
+    return 100 + int(math.sqrt(width * height))
+
+
+def parse_commands(line):
+    """
+    :return: Liste von (Befehl, Argumente) in der gesendeten Reihenfolge
+    """
+    commands = []
+    for command, arguments in COMMAND_PATTERN.findall(line):
+        try:
+            commands.append((command, [float(value) for value in arguments.split()]))
+        except ValueError:
+            continue
+    return commands
+
+
+def generate_map(width, height, num_players, rnd):
+    """
+    Erzeugt eine punkt- (2 Spieler) bzw. achsensymmetrische (4 Spieler) Karte.
+
+    :return: Startpunkte der Spieler und Planeten als Liste von (x, y, Radius)
+    """
+    if num_players == 2:
+        starts = [(width * 0.25, height * 0.5), (width * 0.75, height * 0.5)]
+
+        def mirror(x, y):
+            return [(x, y), (width - x, height - y)]
+    elif num_players == 4:
+        starts = [(width * 0.25, height * 0.25), (width * 0.75, height * 0.25),
+                  (width * 0.25, height * 0.75), (width * 0.75, height * 0.75)]
+
+        def mirror(x, y):
+            return [(x, y), (width - x, y), (x, height - y), (width - x, height - y)]
+    else:
+        raise ValueError("Es werden nur 2 oder 4 Spieler unterstützt")
+
+    planets = []
+    num_groups = rnd.randint(4, 8) if num_players == 4 else rnd.randint(6, 12)
+    for _ in range(num_groups):
+        for _ in range(1000):
+            radius = rnd.uniform(3, 8)
+            x = rnd.uniform(radius + 4, width - radius - 4)
+            y = rnd.uniform(radius + 4, height - radius - 4)
+            group = mirror(x, y)
+            # Planeten dürfen sich nicht (auch nicht mit ihren Spiegelbildern) zu nahe kommen
+            free = all(math.hypot(gx - px, gy - py) > radius + pr + 6 for gx, gy in group for px, py, pr in planets)
+            free = free and all(math.hypot(ax - bx, ay - by) > 2 * radius + 6
+                                for i, (ax, ay) in enumerate(group) for bx, by in group[i + 1:])
+            free = free and all(math.hypot(gx - sx, gy - sy) > radius + 12 for gx, gy in group for sx, sy in starts)
+            if free:
+                planets.extend((gx, gy, radius) for gx, gy in group)
+                break
+    return starts, planets
+
+
+class Simulation:
+    """
+    Spielzustand als NumPy-Spalten (eine Zeile pro Schiff bzw. Planet). Zerstörte Schiffe werden am Ende jeder
+    Runde entfernt, zerstörte Planeten bleiben mit alive = False stehen.
+    """
+
+    def __init__(self, width, height, num_players, seed=None):
+        self.width = width
+        self.height = height
+        self.num_players = num_players
+        self.turn = 0
+        self.eliminated_at = [None] * num_players
+        rnd = random.Random(seed)
+
+        starts, planets = generate_map(width, height, num_players, rnd)
+
+        self.planet_x = np.array([p[0] for p in planets], dtype=float)
+        self.planet_y = np.array([p[1] for p in planets], dtype=float)
+        self.planet_r = np.array([p[2] for p in planets], dtype=float)
+        self.planet_hp = np.floor(self.planet_r * PLANET_HEALTH_PER_RADIUS)
+        self.planet_spots = np.maximum(2, (self.planet_r / 2).astype(int))
+        self.planet_production = np.zeros(len(planets))
+        self.planet_remaining = np.floor(self.planet_r * PLANET_PRODUCTION_PER_RADIUS)
+        self.planet_owner = np.full(len(planets), NO_OWNER)
+        self.planet_alive = np.ones(len(planets), dtype=bool)
+
+        self.next_ship_id = 0
+        self.ship_id = np.empty(0, dtype=int)
+        self.ship_owner = np.empty(0, dtype=int)
+        self.ship_x = np.empty(0)
+        self.ship_y = np.empty(0)
+        self.ship_hp = np.empty(0)
+        self.ship_vx = np.empty(0)
+        self.ship_vy = np.empty(0)
+        self.ship_status = np.empty(0, dtype=int)
+        self.ship_planet = np.empty(0, dtype=int)
+        self.ship_progress = np.empty(0, dtype=int)
+        self.ship_cooldown = np.empty(0, dtype=int)
+
+        for player, (x, y) in enumerate(starts):
+            for k in range(SHIPS_PER_PLAYER):
+                self._spawn(player, x, y + 2 * (k - (SHIPS_PER_PLAYER - 1) / 2))
+
+    _SHIP_FIELDS = ("ship_id", "ship_owner", "ship_x", "ship_y", "ship_hp", "ship_vx", "ship_vy", "ship_status",
+                    "ship_planet", "ship_progress", "ship_cooldown")
+
+    def _spawn(self, player, x, y):
+        values = (self.next_ship_id, player, x, y, constants.BASE_SHIP_HEALTH, 0, 0, UNDOCKED, 0, 0, 0)
+        for field, value in zip(self._SHIP_FIELDS, values):
+            setattr(self, field, np.append(getattr(self, field), value))
+        self.next_ship_id += 1
+
+    def _keep_ships(self, mask):
+        for field in self._SHIP_FIELDS:
+            setattr(self, field, getattr(self, field)[mask])
+
+    def frame(self):
+        """
+        :return: Der Spielzustand im Format der Engine (eine Zeile)
+        """
+        tokens = [str(self.num_players)]
+        for player in range(self.num_players):
+            rows = np.flatnonzero(self.ship_owner == player)
+            tokens += [str(player), str(len(rows))]
+            for i in rows:
+                tokens.append("{} {:.4f} {:.4f} {} {:.4f} {:.4f} {} {} {} {}".format(
+                    self.ship_id[i], self.ship_x[i], self.ship_y[i], int(self.ship_hp[i]),
+                    self.ship_vx[i], self.ship_vy[i], self.ship_status[i],
+                    self.ship_planet[i] if self.ship_status[i] != UNDOCKED else 0,
+                    self.ship_progress[i], self.ship_cooldown[i]))
+
+        planets = np.flatnonzero(self.planet_alive)
+        tokens.append(str(len(planets)))
+        for p in planets:
+            docked = self.ship_id[(self.ship_planet == p) & (self.ship_status != UNDOCKED)]
+            owner = self.planet_owner[p]
+            tokens.append("{} {:.4f} {:.4f} {} {:.4f} {} {} {} {} {} {}".format(
+                p, self.planet_x[p], self.planet_y[p], int(self.planet_hp[p]), self.planet_r[p],
+                self.planet_spots[p], int(self.planet_production[p]), int(self.planet_remaining[p]),
+                int(owner != NO_OWNER), max(owner, 0), len(docked)))
+            tokens.extend(str(ship_id) for ship_id in docked)
+        return " ".join(tokens)
+
+    def alive_players(self):
+        return [player for player in range(self.num_players) if self.eliminated_at[player] is None]
+
+    def is_over(self, max_turns):
+        return len(self.alive_players()) <= 1 or self.turn >= max_turns
+
+    def eliminate(self, player):
+        # Spieler scheidet aus (keine Schiffe mehr, Absturz oder Zeitüberschreitung)
+        if self.eliminated_at[player] is None:
+            self.eliminated_at[player] = self.turn
+        self._keep_ships(self.ship_owner != player)
+        self._release_planets()
+
+    def ranking(self):
+        """
+        :return: Spieler-IDs vom besten zum schlechtesten; Überlebende nach Anzahl und Lebenspunkten ihrer Schiffe,
+            ausgeschiedene nach dem Zeitpunkt ihres Ausscheidens
+        """
+        def key(player):
+            eliminated = self.eliminated_at[player]
+            ships = self.ship_owner == player
+            return (eliminated is None, eliminated or 0, np.count_nonzero(ships), self.ship_hp[ships].sum())
+        return sorted(range(self.num_players), key=key, reverse=True)
+
+    def step(self, commands):
+        """
+        Berechnet eine Runde.
+
+        :param commands: Dict Spieler-ID -> Liste von (Befehl, Argumente)
+        """
+        self.turn += 1
+        self.ship_cooldown = np.maximum(self.ship_cooldown - 1, 0)
+
+        self._apply_commands(commands)
+        destroyed = self._move()
+        self._apply_drag()
+        destroyed |= (self.ship_x < 0) | (self.ship_x >= self.width) | (self.ship_y < 0) | (self.ship_y >= self.height)
+        destroyed |= self._attack(destroyed)
+        self._keep_ships(~destroyed)
+
+        self._update_docking()
+        self._destroy_planets()
+        self._release_planets()
+        self._produce()
+
+        for player in self.alive_players():
+            if not (self.ship_owner == player).any():
+                self.eliminated_at[player] = self.turn
+
+    def _apply_drag(self):
+        # wie in der Engine; bei DRAG > MAX_SPEED bleiben die Schiffe nach jeder Runde stehen
+        speed = np.hypot(self.ship_vx, self.ship_vy)
+        factor = np.maximum(speed - DRAG, 0) / np.maximum(speed, 1e-9)
+        self.ship_vx = self.ship_vx * factor
+        self.ship_vy = self.ship_vy * factor
+
+    def _apply_commands(self, commands):
+        row_of_id = {ship_id: row for row, ship_id in enumerate(self.ship_id.tolist())}
+        dock_requests = {}  # Planet -> Liste von (Spieler, Schiff-Zeile)
+        issued = set()
+
+        for player, player_commands in commands.items():
+            for command, arguments in player_commands:
+                row = row_of_id.get(int(arguments[0])) if arguments else None
+                # nur eigene Schiffe und höchstens ein Befehl pro Schiff
+                if row is None or self.ship_owner[row] != player or row in issued:
+                    continue
+                issued.add(row)
+                status = self.ship_status[row]
+
+                if command == "t" and len(arguments) == 3 and status == UNDOCKED:
+                    magnitude = min(max(int(arguments[1]), 0), constants.MAX_SPEED)
+                    angle = math.radians(int(arguments[2]))
+                    self.ship_vx[row] = magnitude * math.cos(angle)
+                    self.ship_vy[row] = magnitude * math.sin(angle)
+                elif command == "d" and len(arguments) == 2 and status == UNDOCKED:
+                    planet = int(arguments[1])
+                    if 0 <= planet < len(self.planet_alive) and self.planet_alive[planet]:
+                        dock_requests.setdefault(planet, []).append((player, row))
+                elif command == "u" and len(arguments) == 1 and status == DOCKED:
+                    self.ship_status[row] = UNDOCKING
+                    self.ship_progress[row] = constants.DOCK_TURNS
+
+        for planet, requests in dock_requests.items():
+            owner = self.planet_owner[planet]
+            players = {player for player, _ in requests}
+            # freie Planeten, um die sich mehrere Spieler gleichzeitig bemühen, bekommt keiner
+            if owner == NO_OWNER and len(players) > 1:
+                continue
+            occupied = np.count_nonzero((self.ship_planet == planet) & (self.ship_status != UNDOCKED))
+            for player, row in requests:
+                distance = math.hypot(self.ship_x[row] - self.planet_x[planet], self.ship_y[row] - self.planet_y[planet])
+                if (owner not in (NO_OWNER, player) or occupied >= self.planet_spots[planet]
+                        or distance > self.planet_r[planet] + constants.DOCK_RADIUS + constants.SHIP_RADIUS):
+                    continue
+                self.ship_status[row] = DOCKING
+                self.ship_planet[row] = planet
+                self.ship_progress[row] = constants.DOCK_TURNS
+                self.planet_owner[planet] = owner = player
+                occupied += 1
+
+    def _move(self):
+        """
+        Bewegt alle Schiffe gleichzeitig. Kollisionen werden in zeitlicher Reihenfolge abgearbeitet: zwei Schiffe
+        werden beide zerstört, ein Schiff, das einen Planeten trifft, wird zerstört und beschädigt ihn.
+
+        :return: Maske der zerstörten Schiffe
+        """
+        num_ships = len(self.ship_id)
+        destroyed = np.zeros(num_ships, dtype=bool)
+        events = []
+
+        if num_ships > 1:
+            times = _contact_times(self.ship_x[:, np.newaxis], self.ship_y[:, np.newaxis],
+                                   self.ship_vx[:, np.newaxis], self.ship_vy[:, np.newaxis],
+                                   self.ship_x, self.ship_y, self.ship_vx, self.ship_vy, 2 * constants.SHIP_RADIUS)
+            times[np.tril_indices(num_ships)] = np.inf
+            for i, j in zip(*np.nonzero(np.isfinite(times))):
+                events.append((times[i, j], i, j, False))
+
+        planets = np.flatnonzero(self.planet_alive)
+        if num_ships and len(planets):
+            times = _contact_times(self.ship_x[:, np.newaxis], self.ship_y[:, np.newaxis],
+                                   self.ship_vx[:, np.newaxis], self.ship_vy[:, np.newaxis],
+                                   self.planet_x[planets], self.planet_y[planets], 0, 0,
+                                   self.planet_r[planets] + constants.SHIP_RADIUS)
+            # angedockte Schiffe berühren ihren Planeten nicht
+            for i, k in zip(*np.nonzero(np.isfinite(times))):
+                if self.ship_status[i] == UNDOCKED or self.ship_planet[i] != planets[k]:
+                    events.append((times[i, k], i, planets[k], True))
+
+        for _, i, j, with_planet in sorted(events):
+            if destroyed[i]:
+                continue
+            if with_planet:
+                if self.planet_alive[j] and self.planet_hp[j] > 0:
+                    self.planet_hp[j] -= self.ship_hp[i]
+                    destroyed[i] = True
+            elif not destroyed[j]:
+                destroyed[i] = destroyed[j] = True
+
+        self.ship_x = self.ship_x + self.ship_vx
+        self.ship_y = self.ship_y + self.ship_vy
+        return destroyed
+
+    def _attack(self, destroyed):
+        """
+        Jedes nicht angedockte Schiff ohne Abklingzeit verteilt WEAPON_DAMAGE gleichmäßig auf alle gegnerischen
+        Schiffe in Reichweite. Alle Angriffe einer Runde werden gleichzeitig ausgewertet.
+
+        :return: Maske der dadurch zerstörten Schiffe
+        """
+        alive = ~destroyed
+        distance = np.hypot(self.ship_x[:, np.newaxis] - self.ship_x, self.ship_y[:, np.newaxis] - self.ship_y)
+        in_range = ((distance <= constants.WEAPON_RADIUS + 2 * constants.SHIP_RADIUS)
+                    & (self.ship_owner[:, np.newaxis] != self.ship_owner) & alive[:, np.newaxis] & alive)
+        attackers = alive & (self.ship_status == UNDOCKED) & (self.ship_cooldown == 0)
+        in_range &= attackers[:, np.newaxis]
+
+        num_targets = in_range.sum(axis=1)
+        damage = np.where(num_targets > 0, constants.WEAPON_DAMAGE // np.maximum(num_targets, 1), 0)
+        self.ship_hp = self.ship_hp - (in_range * damage[:, np.newaxis]).sum(axis=0)
+        self.ship_cooldown[num_targets > 0] = constants.WEAPON_COOLDOWN
+        return self.ship_hp <= 0
+
+    def _update_docking(self):
+        busy = (self.ship_status == DOCKING) | (self.ship_status == UNDOCKING)
+        self.ship_progress[busy] -= 1
+        finished = busy & (self.ship_progress <= 0)
+        self.ship_status[finished & (self.ship_status == DOCKING)] = DOCKED
+        undocked = finished & (self.ship_status == UNDOCKING)
+        self.ship_status[undocked] = UNDOCKED
+        self.ship_planet[undocked] = 0
+        self.ship_progress[finished] = 0
+
+    def _destroy_planets(self):
+        # zerstörte Planeten explodieren: angedockte Schiffe sterben, Schiffe in der Nähe werden beschädigt
+        for planet in np.flatnonzero(self.planet_alive & (self.planet_hp <= 0)):
+            self.planet_alive[planet] = False
+            surface_distance = np.hypot(self.ship_x - self.planet_x[planet],
+                                        self.ship_y - self.planet_y[planet]) - self.planet_r[planet]
+            damage = constants.MAX_SHIP_HEALTH * np.clip(1 - surface_distance / constants.EXPLOSION_RADIUS, 0, 1)
+            self.ship_hp = self.ship_hp - np.floor(damage)
+            docked = (self.ship_planet == planet) & (self.ship_status != UNDOCKED)
+            self._keep_ships((self.ship_hp > 0) & ~docked)
+
+    def _release_planets(self):
+        # Planeten ohne angedockte Schiffe verlieren ihren Besitzer
+        occupied = np.zeros(len(self.planet_alive), dtype=bool)
+        occupied[self.ship_planet[self.ship_status != UNDOCKED]] = True
+        self.planet_owner[~occupied | ~self.planet_alive] = NO_OWNER
+
+    def _produce(self):
+        docked = np.bincount(self.ship_planet[self.ship_status == DOCKED], minlength=len(self.planet_alive))
+        production = np.minimum(docked * constants.BASE_PRODUCTIVITY, self.planet_remaining)
+        self.planet_production += production
+        self.planet_remaining -= production
+
+        for planet in np.flatnonzero((self.planet_production >= SHIP_COST) & (self.planet_owner != NO_OWNER)):
+            while self.planet_production[planet] >= SHIP_COST:
+                spawn = self._spawn_point(planet)
+                if spawn is None:
+                    break
+                self._spawn(self.planet_owner[planet], *spawn)
+                self.planet_production[planet] -= SHIP_COST
+
+    def _spawn_point(self, planet):
+        # freier Punkt SPAWN_RADIUS vor der Oberfläche, möglichst in Richtung Kartenmitte
+        toward_centre = math.atan2(self.height / 2 - self.planet_y[planet], self.width / 2 - self.planet_x[planet])
+        distance = self.planet_r[planet] + constants.SPAWN_RADIUS + constants.SHIP_RADIUS
+        for offset in range(0, 180, 15):
+            for sign in ((1,) if offset == 0 else (1, -1)):
+                angle = toward_centre + sign * math.radians(offset)
+                x = self.planet_x[planet] + distance * math.cos(angle)
+                y = self.planet_y[planet] + distance * math.sin(angle)
+                if not (0 <= x < self.width and 0 <= y < self.height):
+                    continue
+                if (np.hypot(self.ship_x - x, self.ship_y - y) <= 2 * constants.SHIP_RADIUS).any():
+                    continue
+                planets = self.planet_alive
+                if (np.hypot(self.planet_x[planets] - x, self.planet_y[planets] - y)
+                        <= self.planet_r[planets] + constants.SHIP_RADIUS).any():
+                    continue
+                return x, y
+        return None
+
+
+def _contact_times(x1, y1, vx1, vy1, x2, y2, vx2, vy2, radius):
+    """
+    Erster Zeitpunkt in [0, 1], zu dem sich zwei gleichförmig bewegte Kreise mit Radiensumme radius berühren
+    (elementweise mit Broadcasting; inf, wenn sie sich in dieser Runde nicht berühren).
+    """
+    dx, dy = x2 - x1, y2 - y1
+    dvx, dvy = vx2 - vx1, vy2 - vy1
+    a = dvx * dvx + dvy * dvy
+    b = 2 * (dx * dvx + dy * dvy)
+    c = dx * dx + dy * dy - radius * radius
+    discriminant = b * b - 4 * a * c
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (-b - np.sqrt(np.maximum(discriminant, 0))) / (2 * a)
+    touching = (a > 0) & (discriminant >= 0) & (t >= 0) & (t <= 1)
+    return np.where(c <= 0, 0.0, np.where(touching, t, np.inf))
+
+
+class BotProcess:
+    """
+    Ein Bot als Unterprozess. Ein Lesethread legt die Antworten in eine Queue, damit Zeitlimits eingehalten werden.
+    """
+
+    def __init__(self, command, cwd=None):
+        self.command = command
+        self.name = None
+        self.error = None
+        # Antwortzeit (Sekunden) auf jede Runde
+        self.turn_times = []
+        self._sent_at = None
+        arguments = shlex.split(command) if isinstance(command, str) else list(command)
+        self._process = subprocess.Popen(arguments, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         stderr=subprocess.DEVNULL, cwd=cwd, text=True, bufsize=1)
+        self._lines = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self._process.stdout:
+            self._lines.put(line.rstrip("\n"))
+        self._lines.put(None)
+
+    def send(self, line):
+        try:
+            self._process.stdin.write(line + "\n")
+            self._process.stdin.flush()
+            self._sent_at = time.perf_counter()
+        except (BrokenPipeError, OSError):
+            self.error = self.error or "Eingabe geschlossen"
+
+    def receive(self, timeout):
+        """
+        :return: Die nächste Zeile des Bots oder None (Zeitüberschreitung oder Prozess beendet)
+        """
+        if self.error:
+            return None
+        try:
+            line = self._lines.get(timeout=timeout)
+        except queue.Empty:
+            self.error = "Zeitüberschreitung"
+            return None
+        if line is None:
+            self.error = "Prozess beendet"
+        return line
+
+    def kill(self):
+        try:
+            self._process.stdin.close()
+        except OSError:
+            pass
+        self._process.kill()
+        self._process.wait()
+
+
+def run_game(bot_commands, width=240, height=160, seed=None, max_turns=None, timeouts=True, cwd=None):
+    """
+    Spielt ein komplettes Spiel.
+
+    :param bot_commands: ein Befehl (z.B. "python3 Jarvis.py") pro Spieler, 2 oder 4 Spieler
+    :param seed: Zufallswert für die Karte
+    :param max_turns: maximale Rundenzahl (Standard wie in der Engine)
+    :param timeouts: ob die Zeitlimits der Engine gelten (sonst wird beliebig lange gewartet)
+    :param cwd: Arbeitsverzeichnis der Bots (dort landen ihre Logdateien)
+    :return: Dict mit Karte, Rundenzahl und Ergebnis pro Spieler
+    """
+    if max_turns is None:
+        max_turns = default_max_turns(width, height)
+    simulation = Simulation(width, height, len(bot_commands), seed)
+    bots = [BotProcess(command, cwd) for command in bot_commands]
+    initial_timeout = INITIAL_TIMEOUT if timeouts else None
+    turn_timeout = TURN_TIMEOUT if timeouts else None
+
+    try:
+        frame = simulation.frame()
+        for player, bot in enumerate(bots):
+            bot.send(str(player))
+            bot.send("{} {}".format(width, height))
+            bot.send(frame)
+        for player, bot in enumerate(bots):
+            bot.name = bot.receive(initial_timeout)
+            if bot.name is None:
+                simulation.eliminate(player)
+
+        while not simulation.is_over(max_turns):
+            frame = simulation.frame()
+            alive = simulation.alive_players()
+            for player in alive:
+                bots[player].send(frame)
+            commands = {}
+            for player in alive:
+                line = bots[player].receive(turn_timeout)
+                bots[player].turn_times.append(time.perf_counter() - bots[player]._sent_at)
+                if line is None:
+                    simulation.eliminate(player)
+                else:
+                    commands[player] = parse_commands(line)
+            simulation.step(commands)
+    finally:
+        for bot in bots:
+            bot.kill()
+
+    ranking = simulation.ranking()
+    players = []
+    for player, bot in enumerate(bots):
+        ships = simulation.ship_owner == player
+        players.append({
+            "id": player,
+            "command": bot.command,
+            "name": bot.name,
+            "rank": ranking.index(player) + 1,
+            "ships": int(np.count_nonzero(ships)),
+            "health": int(simulation.ship_hp[ships].sum()),
+            "planets": int(np.count_nonzero(simulation.planet_owner == player)),
+            "eliminated_at": simulation.eliminated_at[player],
+            "error": bot.error,
+            "turn_times": bot.turn_times,
+        })
+    return {"seed": seed, "width": width, "height": height, "turns": simulation.turn, "players": players}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("bots", nargs="+", help="Befehle zum Starten der Bots (2 oder 4)")
+    parser.add_argument("-d", "--dimensions", default="240 160", help='Kartengröße, z.B. "240 160"')
+    parser.add_argument("-s", "--seed", type=int, help="Zufallswert für die Karte")
+    parser.add_argument("--max-turns", type=int, help="maximale Rundenzahl")
+    parser.add_argument("--no-timeout", action="store_true", help="Zeitlimits der Engine abschalten")
+    parser.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    args = parser.parse_args()
+
+    if len(args.bots) not in (2, 4):
+        parser.error("Es werden nur 2 oder 4 Bots unterstützt")
+    width, height = (int(value) for value in args.dimensions.split())
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 31)
+
+    result = run_game(args.bots, width, height, seed, args.max_turns, timeouts=not args.no_timeout)
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+        return
+
+    print("Karte {}x{}, Seed {}, {} Runden".format(width, height, seed, result["turns"]))
+    for player in sorted(result["players"], key=lambda p: p["rank"]):
+        print("{}. Spieler {} ({}): {} Schiffe, {} Planeten{}".format(
+            player["rank"], player["id"], player["name"] or player["command"], player["ships"], player["planets"],
+            ", Fehler: " + player["error"] if player["error"] else ""))
+
+
+if __name__ == "__main__":
+    main()
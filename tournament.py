@@ -0,0 +1,171 @@
+"""
+Turnier über alle CPU-Kerne: spielt viele Spiele im Simulator (siehe simulator.py) parallel in einem Prozesspool und
+fasst Siegquoten (mit 95%-Konfidenzintervall nach Wilson), Platzierungen und Antwortzeiten pro Runde zusammen.
+
+Die Sitzplätze werden von Spiel zu Spiel rotiert, Kartengrößen und Spielerzahlen abwechselnd gespielt. Jedes Spiel
+läuft in einem eigenen temporären Verzeichnis (für die Logdateien der Bots).
+
+Aufruf: python tournament.py "python3 Jarvis.py" "python3 MyBot-v4.py" [--games 100] [--players 2 4]
+        [--sizes 240x160 288x192] [--seed 0] [--workers N] [--output summary.json]
+"""
+import argparse
+import json
+import math
+import os
+import shlex
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import simulator
+
+# z-Wert für ein 95%-Konfidenzintervall
+CONFIDENCE_Z = 1.96
+
+
+def wilson_interval(wins, games, z=CONFIDENCE_Z):
+    """
+    :return: (untere, obere) Grenze des Konfidenzintervalls der Siegquote
+    """
+    if games == 0:
+        return 0.0, 1.0
+    rate = wins / games
+    denominator = 1 + z * z / games
+    centre = (rate + z * z / (2 * games)) / denominator
+    spread = z * math.sqrt(rate * (1 - rate) / games + z * z / (4 * games * games)) / denominator
+    return max(centre - spread, 0.0), min(centre + spread, 1.0)
+
+
+def schedule(bots, games, player_counts, sizes, seed):
+    """
+    :return: Liste der Spiele als Dicts (Seed, Kartengröße, Bot-Index pro Sitzplatz)
+    """
+    matches = []
+    for game in range(games):
+        num_players = player_counts[game % len(player_counts)]
+        width, height = sizes[(game // len(player_counts)) % len(sizes)]
+        # Sitzplätze rotieren, damit kein Bot von einer Startposition profitiert
+        seats = [(game + seat) % len(bots) for seat in range(num_players)]
+        matches.append({"game": game, "seed": seed + game, "width": width, "height": height, "seats": seats})
+    return matches
+
+
+def _absolute_command(command):
+    # Skripte relativ zum aktuellen Verzeichnis auflösen, weil die Bots in einem temporären Verzeichnis laufen
+    return " ".join(shlex.quote(os.path.abspath(part)) if os.path.isfile(part) else shlex.quote(part)
+                    for part in shlex.split(command))
+
+
+def play(match, bots, max_turns, timeouts):
+    # läuft im Worker-Prozess
+    with tempfile.TemporaryDirectory(prefix="jarvis_tournament_") as directory:
+        started = time.perf_counter()
+        result = simulator.run_game([bots[index] for index in match["seats"]], match["width"], match["height"],
+                                    match["seed"], max_turns, timeouts, cwd=directory)
+    result.update(match, duration=time.perf_counter() - started)
+    return result
+
+
+def summarize(bots, results):
+    """
+    :return: Zusammenfassung pro Bot (gesamt und pro Spielerzahl/Kartengröße)
+    """
+    summary = []
+    for index, bot in enumerate(bots):
+        # sitzt ein Bot mehrfach in einem Spiel, zählt sein bester Platz
+        entries = []
+        turn_times = []
+        for result in results:
+            players = [player for player in result["players"] if result["seats"][player["id"]] == index]
+            if players:
+                best = min(players, key=lambda player: player["rank"])
+                entries.append((result, best, any(player["error"] is not None for player in players)))
+                turn_times.extend(t for player in players for t in player["turn_times"])
+        turn_times = np.array(turn_times)
+        games = len(entries)
+        wins = sum(player["rank"] == 1 for _, player, _ in entries)
+        low, high = wilson_interval(wins, games)
+
+        configurations = {}
+        for result, player, _ in entries:
+            key = "{}p {}x{}".format(len(result["seats"]), result["width"], result["height"])
+            configuration = configurations.setdefault(key, {"games": 0, "wins": 0})
+            configuration["games"] += 1
+            configuration["wins"] += player["rank"] == 1
+        for configuration in configurations.values():
+            configuration["win_rate"] = configuration["wins"] / configuration["games"]
+            configuration["win_rate_ci"] = wilson_interval(configuration["wins"], configuration["games"])
+
+        summary.append({
+            "bot": bot,
+            "games": games,
+            "wins": wins,
+            "win_rate": wins / games if games else 0.0,
+            "win_rate_ci": (low, high),
+            "mean_rank": float(np.mean([player["rank"] for _, player, _ in entries])) if entries else None,
+            "errors": sum(error for _, _, error in entries),
+            "turn_time_ms": {
+                "mean": float(turn_times.mean() * 1e3),
+                "p50": float(np.percentile(turn_times, 50) * 1e3),
+                "p90": float(np.percentile(turn_times, 90) * 1e3),
+                "p99": float(np.percentile(turn_times, 99) * 1e3),
+                "max": float(turn_times.max() * 1e3),
+            } if len(turn_times) else None,
+            "configurations": configurations,
+        })
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("bots", nargs="+", help="Befehle zum Starten der Bots (mindestens 2)")
+    parser.add_argument("--games", type=int, default=100, help="Anzahl der Spiele")
+    parser.add_argument("--players", type=int, nargs="+", default=[2], choices=(2, 4), help="Spieler pro Spiel")
+    parser.add_argument("--sizes", nargs="+", default=["240x160"], help="Kartengrößen, z.B. 240x160 288x192")
+    parser.add_argument("--seed", type=int, default=0, help="Seed des ersten Spiels (danach fortlaufend)")
+    parser.add_argument("--max-turns", type=int, help="maximale Rundenzahl pro Spiel")
+    parser.add_argument("--no-timeout", action="store_true", help="Zeitlimits der Engine abschalten")
+    # jedes Spiel beschäftigt mehrere Bot-Prozesse, daher standardmäßig nur ein Spiel pro zwei Kerne
+    parser.add_argument("--workers", type=int, default=max((os.cpu_count() or 2) // 2, 1),
+                        help="Anzahl gleichzeitiger Spiele")
+    parser.add_argument("--output", help="Datei für die Zusammenfassung und alle Ergebnisse (JSON)")
+    args = parser.parse_args()
+
+    if len(args.bots) < 2:
+        parser.error("Es werden mindestens 2 Bots benötigt")
+    bots = [_absolute_command(bot) for bot in args.bots]
+    sizes = [tuple(int(value) for value in size.lower().split("x")) for size in args.sizes]
+    matches = schedule(bots, args.games, args.players, sizes, args.seed)
+
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(play, match, bots, args.max_turns, not args.no_timeout) for match in matches]
+        for future in as_completed(futures):
+            results.append(future.result())
+            print("\r{}/{} Spiele".format(len(results), len(matches)), end="", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+    duration = time.perf_counter() - started
+    results.sort(key=lambda result: result["game"])
+
+    summary = summarize(bots, results)
+    print("{} Spiele in {:.0f} s ({:.0f} Spiele pro Stunde, {} Worker)".format(
+        len(results), duration, len(results) / duration * 3600, args.workers))
+    print("{:<40} {:>6} {:>8} {:>15} {:>6} {:>10} {:>10}".format(
+        "Bot", "Spiele", "Siege", "95%-KI", "Platz", "p50 (ms)", "p99 (ms)"))
+    for entry in summary:
+        times = entry["turn_time_ms"] or {"p50": math.nan, "p99": math.nan}
+        print("{:<40} {:>6} {:>7.1%} {:>7.1%}-{:<7.1%} {:>6.2f} {:>10.1f} {:>10.1f}".format(
+            entry["bot"][-40:], entry["games"], entry["win_rate"], entry["win_rate_ci"][0], entry["win_rate_ci"][1],
+            entry["mean_rank"] or math.nan, times["p50"], times["p99"]))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"summary": summary, "duration": duration, "games": results}, file, indent=1)
+
+
+if __name__ == "__main__":
+    main()